@@ -0,0 +1,109 @@
+"""Offline accuracy and latency of title→MAL id resolution against the catalog fixture snapshot.
+
+    python -m bench.catalog_bench --synthetic 50000 --out catalog_output.json
+
+Each query line is {"query", "kind", "expected": [kind, mal_id]}; a query is
+correct when the top match is the expected entry. `--synthetic` pads the catalog
+with generated titles to approximate a full Jikan ingest, so lookup and refresh
+timings reflect a realistic index size.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+from bench.load_test import percentile
+
+SNAPSHOT = os.path.join(os.path.dirname(__file__), "catalog_snapshot.json")
+QUERIES = os.path.join(os.path.dirname(__file__), "catalog_queries.jsonl")
+SYLLABLES = ["ka", "ki", "ku", "no", "shi", "to", "ra", "mi", "yo", "ha", "ren", "sei", "ryu", "tsu", "ma", "go"]
+
+
+def synthetic_rows(count: int, start_id: int = 1_000_000) -> list[dict]:
+    random.seed(0)
+    rows = []
+    for i in range(count):
+        words = ["".join(random.choices(SYLLABLES, k=random.randint(2, 4))) for _ in range(random.randint(1, 4))]
+        title = " ".join(word.capitalize() for word in words)
+        rows.append({
+            "kind": "anime" if i % 2 else "manga",
+            "mal_id": start_id + i,
+            "title": title,
+            "title_english": f"The {title} Chronicles" if i % 3 == 0 else None,
+            "title_japanese": None,
+            "synonyms": [title.split()[0]] if i % 5 == 0 else [],
+            "score": None,
+            "members": random.randint(0, 100_000),
+            "fetched_at": 0.0,
+        })
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--snapshot", default=SNAPSHOT)
+    parser.add_argument("--queries", default=QUERIES)
+    parser.add_argument("--synthetic", type=int, default=0, help="generated titles added to the catalog")
+    parser.add_argument("--repeat", type=int, default=200, help="timing passes over the queries")
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    from src.catalog import Catalog
+
+    started = time.perf_counter()
+    catalog = Catalog.from_snapshot(args.snapshot)
+    if args.synthetic:
+        catalog.upsert(synthetic_rows(args.synthetic))
+    build_s = time.perf_counter() - started
+
+    with open(args.queries, encoding="utf-8") as fh:
+        rows = [json.loads(line) for line in fh if line.strip()]
+
+    misses = []
+    for row in rows:
+        matches = catalog.resolve(row["query"], row.get("kind"))
+        top = [matches[0].kind, matches[0].mal_id] if matches else None
+        if top != row["expected"]:
+            misses.append({"query": row["query"], "expected": row["expected"], "got": top,
+                           "confidence": matches[0].confidence if matches else None})
+
+    timings = []
+    for _ in range(args.repeat):
+        for row in rows:
+            started = time.perf_counter()
+            catalog.resolve(row["query"], row.get("kind"))
+            timings.append(time.perf_counter() - started)
+    timings.sort()
+
+    # One refresh worth of listing pages (CATALOG_REFRESH_PAGES x 25), half of it already known.
+    refresh = synthetic_rows(50, start_id=1_000_000) + synthetic_rows(50, start_id=2_000_000)
+    started = time.perf_counter()
+    catalog.upsert(refresh)
+    upsert_ms = (time.perf_counter() - started) * 1000
+
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key != "out"},
+        "catalog": catalog.stats(),
+        "build_s": round(build_s, 3),
+        "queries": len(rows),
+        "top1_accuracy": round(1 - len(misses) / len(rows), 3),
+        "misses": misses,
+        "resolve_us": {
+            "mean": round(sum(timings) / len(timings) * 1e6, 2),
+            "p50": round(percentile(timings, 50) * 1e6, 2),
+            "p99": round(percentile(timings, 99) * 1e6, 2),
+        },
+        "upsert_100_ms": round(upsert_ms, 2),
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+"""Local stand-in for the three n8n webhooks the Streamlit app calls.
+
+    python -m bench.fake_n8n --port 5679 --chat-latency 2 --read-latency 0.2 --error-rate 0.01
+
+Point N8N_WEBHOOK_URL, N8N_GET_HISTORY_URL and N8N_GET_SESSIONS_URL at
+http://127.0.0.1:<port>/webhook/chat, /webhook/get-history and /webhook/get-sessions.
+Responses mirror the workflow's Code2/Code3/Code5 nodes, including history paging
+and `fields` projection. Chat replies stream as n8n's newline-delimited
+`begin`/`item`/`end` chunks, like the workflow's streaming Webhook; `--plain-chat`
+answers with one JSON body instead, like a `Respond to Webhook` node. Like n8n, bodies over 1 KB are gzipped when the client
+accepts it. Unlike n8n, it also answers msgpack to clients that ask for it
+(N8N_ACCEPT_MSGPACK) when msgpack is installed.
+"""
+import argparse
+import gzip
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+def _base36(num: int) -> str:
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    out = ""
+    while True:
+        num, rem = divmod(num, 36)
+        out = digits[rem] + out
+        if not num:
+            return out
+
+
+def _stored(role: str, content: str) -> dict:
+    """A message as n8n's chat memory stores it, LangChain metadata included."""
+    data = {"content": content, "additional_kwargs": {}, "response_metadata": {}}
+    if role == "ai":
+        data.update(tool_calls=[], invalid_tool_calls=[])
+    return {"type": role, "data": data}
+
+
+class FakeN8n:
+    """In-memory sessions plus the latency/jitter/error knobs shared by all handler threads."""
+
+    def __init__(self, chat_latency: float = 1.0, read_latency: float = 0.1, jitter: float = 0.2,
+                 error_rate: float = 0.0, history_size: int = 40, seed_sessions: int = 3,
+                 streaming: bool = True) -> None:
+        self.chat_latency = chat_latency
+        self.read_latency = read_latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.history_size = history_size
+        self.seed_sessions = seed_sessions
+        self.streaming = streaming
+        self.sessions: dict[str, list] = {}
+        self.owners: dict[str, list] = {}
+        self.updated: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._counter = 0
+
+    def delay(self, base: float) -> None:
+        time.sleep(max(0.0, random.gauss(base, base * self.jitter)))
+
+    def should_fail(self) -> bool:
+        return random.random() < self.error_rate
+
+    def _new_session_id(self, username: str | None) -> str:
+        # Same `web_{username}_{base36 ms}_{suffix}` format as the workflow's Code node.
+        self._counter += 1
+        return f"web_{username or 'anon'}_{_base36(int(time.time() * 1000))}_{_base36(self._counter):0>5}"
+
+    def _seed(self, username: str) -> None:
+        if username in self.owners:
+            return
+        self.owners[username] = []
+        for _ in range(self.seed_sessions):
+            session_id = self._new_session_id(username)
+            self.owners[username].append(session_id)
+            self.sessions[session_id] = [
+                _stored("human" if i % 2 == 0 else "ai", f"seeded message {i} " + "x" * 80)
+                for i in range(self.history_size)
+            ]
+
+    def chat(self, body: dict) -> dict:
+        username = (body.get("username") or "").lower().strip() or None
+        with self._lock:
+            session_id = body.get("session_id") or self._new_session_id(username)
+            if session_id not in self.sessions:
+                self.sessions[session_id] = []
+                if username:
+                    self._seed(username)
+                    self.owners[username].append(session_id)
+            reply = body.get("cached_answer") or f"Fake agent answer to: {body.get('message', '')}"
+            self.sessions[session_id] += [_stored("human", body.get("message", "")), _stored("ai", reply)]
+            self.updated[session_id] = time.time()
+        return {"response": reply, "sessionId": session_id, "source": "streamlit", "username": username}
+
+    def history(self, body: dict) -> list:
+        with self._lock:
+            messages = list(self.sessions.get(body.get("session_id"), []))
+        total = len(messages)
+        start, end = 0, total
+        if body.get("since") is not None:
+            start = min(max(0, body["since"]), total)
+        elif body.get("limit"):
+            end = min(max(0, body["before"]), total) if body.get("before") is not None else total
+            start = max(0, end - body["limit"])
+        page = messages[start:end]
+        fields = body.get("fields")
+        if fields:
+            rows = [[m["type"] if f == "type" else m["data"].get(f, m.get(f)) for f in fields] for m in page]
+            return [{"fields": fields, "messages": rows, "start": start, "total": total}]
+        return [{"messages": page, "start": start, "total": total}]
+
+    def session_list(self, username: str, fields: list[str] | None = None) -> list:
+        with self._lock:
+            self._seed(username)
+            sessions = []
+            for sid in self.owners[username]:
+                created = int(sid.rsplit("_", 2)[1], 36) / 1000
+                sessions.append({
+                    "session_id": sid,
+                    "title": (self.sessions[sid][0]["data"]["content"][:50] if self.sessions[sid] else "new_conversation"),
+                    "created_at": created,
+                    "updated_at": self.updated.get(sid, created),
+                    "message_count": len(self.sessions[sid]),
+                })
+        # Like "Find documents1", most recently active first.
+        sessions.sort(key=lambda s: s["updated_at"], reverse=True)
+        if fields:
+            return [{"fields": fields, "sessions": [[s.get(f) for f in fields] for s in sessions]}]
+        return [{"sessions": sessions}]
+
+
+class FakeN8nHandler(BaseHTTPRequestHandler):
+    fake: FakeN8n = None  # set by serve()
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        path = urlparse(self.path).path
+        if path.endswith("/chat"):
+            if self.fake.should_fail():
+                self.fake.delay(self.fake.chat_latency)
+                return self._send(500, {"message": "Workflow execution failed"})
+            if body.get("cached_answer"):
+                # A cached_answer turn is only stored; the agents do not run.
+                self.fake.delay(self.fake.read_latency)
+                reply = self.fake.chat(body)
+                return self._stream([]) if self.fake.streaming else self._send(200, reply)
+            if self.fake.streaming:
+                reply = self.fake.chat(body)
+                return self._stream(reply["response"].split(" "))
+            self.fake.delay(self.fake.chat_latency)
+            return self._send(200, self.fake.chat(body))
+        if path.endswith("/get-history"):
+            self.fake.delay(self.fake.read_latency)
+            if self.fake.should_fail():
+                return self._send(500, {"message": "Workflow execution failed"})
+            return self._send(200, self.fake.history(body))
+        self._send(404, {"message": "not found"})
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        if url.path.endswith("/get-sessions"):
+            self.fake.delay(self.fake.read_latency)
+            if self.fake.should_fail():
+                return self._send(500, {"message": "Workflow execution failed"})
+            query = parse_qs(url.query)
+            fields = query["fields"][0].split(",") if query.get("fields") else None
+            return self._send(200, self.fake.session_list(query.get("username", [""])[0], fields))
+        if url.path == "/healthz":
+            return self._send(200, {"status": "ok"})
+        self._send(404, {"message": "not found"})
+
+    def _send(self, status: int, obj) -> None:
+        content_type = "application/json"
+        if msgpack and "msgpack" in self.headers.get("Accept", ""):
+            content_type, body = "application/msgpack", msgpack.packb(obj)
+        else:
+            body = json.dumps(obj).encode()
+        gzipped = len(body) > 1024 and "gzip" in self.headers.get("Accept-Encoding", "")
+        if gzipped:
+            body = gzip.compress(body, compresslevel=6)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, words: list[str]) -> None:
+        """Writes the reply as the agent node would stream it, spreading chat latency over the words."""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        meta = {"nodeName": "Supervisor Agent", "itemIndex": 0, "runIndex": 0}
+        chunks = [{"type": "begin", "metadata": meta}]
+        chunks += [{"type": "item", "content": word if i == 0 else " " + word, "metadata": meta}
+                   for i, word in enumerate(words)]
+        chunks.append({"type": "end", "metadata": meta})
+        for chunk in chunks:
+            if chunk["type"] == "item":
+                self.fake.delay(self.fake.chat_latency / len(words))
+            line = json.dumps(chunk).encode() + b"\n"
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+def serve(host: str, port: int, fake: FakeN8n) -> ThreadingHTTPServer:
+    handler = type("BoundFakeN8nHandler", (FakeN8nHandler,), {"fake": fake})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--chat-latency", type=float, default=1.0, help="mean seconds per chat turn")
+    parser.add_argument("--read-latency", type=float, default=0.1, help="mean seconds per history/session read")
+    parser.add_argument("--jitter", type=float, default=0.2, help="latency std-dev as a fraction of the mean")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of an HTTP 500 per request")
+    parser.add_argument("--history-size", type=int, default=40, help="messages in each seeded session")
+    parser.add_argument("--seed-sessions", type=int, default=3, help="sessions seeded per user")
+    parser.add_argument("--plain-chat", action="store_true", help="answer chat with one JSON body instead of streaming")
+
+
+def from_args(args: argparse.Namespace) -> FakeN8n:
+    return FakeN8n(args.chat_latency, args.read_latency, args.jitter, args.error_rate,
+                   args.history_size, args.seed_sessions, not args.plain_chat)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5679)
+    add_arguments(parser)
+    args = parser.parse_args()
+    server = serve(args.host, args.port, from_args(args))
+    print(f"[fake_n8n] listening on http://{args.host}:{args.port}/webhook/")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
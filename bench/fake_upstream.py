@@ -0,0 +1,103 @@
+"""Local stand-in for the Jikan and Animechan APIs behind the caching proxy.
+
+    python -m bench.fake_upstream --port 5680 --latency 0.3 --error-rate 0.05
+
+Point PROXY_JIKAN_UPSTREAM and PROXY_ANIMECHAN_UPSTREAM at http://127.0.0.1:<port>.
+Every GET answers a small JSON body naming the path it was asked for. `down` turns
+the upstream into an outage: "error" answers 503 at once, "hang" stalls each
+request for `hang` seconds, like an upstream that stopped responding.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeUpstream:
+    """Latency/error/outage knobs plus per-path request counts, shared by all handler threads."""
+
+    def __init__(self, latency: float = 0.2, jitter: float = 0.2, error_rate: float = 0.0,
+                 down: str | None = None, hang: float = 30.0) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.down = down
+        self.hang = hang
+        self.requests: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, path: str) -> None:
+        with self._lock:
+            self.requests[path] += 1
+
+    def total(self) -> int:
+        with self._lock:
+            return sum(self.requests.values())
+
+    def respond(self, path: str) -> tuple[int, dict]:
+        self.record(path)
+        if self.down == "hang":
+            time.sleep(self.hang)
+        if self.down == "error":
+            return 503, {"status": 503, "message": "Service Unavailable"}
+        time.sleep(max(0.0, random.gauss(self.latency, self.latency * self.jitter)))
+        if random.random() < self.error_rate:
+            return 500, {"status": 500, "message": "Internal Server Error"}
+        return 200, {"data": [{"path": path, "served_at": time.time()}]}
+
+
+class FakeUpstreamHandler(BaseHTTPRequestHandler):
+    fake: FakeUpstream = None  # set by serve()
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        status, obj = self.fake.respond(self.path)
+        body = json.dumps(obj).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the proxy gave up waiting on a hung request
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+def serve(host: str, port: int, fake: FakeUpstream) -> ThreadingHTTPServer:
+    handler = type("BoundFakeUpstreamHandler", (FakeUpstreamHandler,), {"fake": fake})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency", type=float, default=0.2, help="mean seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.2, help="latency std-dev as a fraction of the mean")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of an HTTP 500 per request")
+    parser.add_argument("--down", choices=("error", "hang"), help="simulate an outage")
+    parser.add_argument("--hang", type=float, default=30.0, help="seconds a request stalls with --down hang")
+
+
+def from_args(args: argparse.Namespace) -> FakeUpstream:
+    return FakeUpstream(args.latency, args.jitter, args.error_rate, args.down, args.hang)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5680)
+    add_arguments(parser)
+    args = parser.parse_args()
+    server = serve(args.host, args.port, from_args(args))
+    print(f"[fake_upstream] listening on http://{args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
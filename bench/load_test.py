@@ -0,0 +1,167 @@
+"""Drives ChatManager from many simulated users and reports latency percentiles per operation.
+
+    python -m bench.load_test --users 50 --turns 3 --out bench_output.json
+
+By default an in-process fake n8n (bench/fake_n8n.py) is started on a free port;
+pass --base-url to target an already running stand-in instead. The JSON report
+(stdout, or --out) is meant to be diffed between runs.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from bench import fake_n8n
+
+
+def percentile(ordered: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    rank = max(1, min(len(ordered), math.ceil(pct / 100 * len(ordered))))
+    return ordered[rank - 1]
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.latencies: dict[str, list] = defaultdict(list)
+        self.errors: dict[str, dict] = defaultdict(lambda: defaultdict(int))
+
+    def record(self, op: str, seconds: float, error: str | None) -> None:
+        with self._lock:
+            self.latencies[op].append(seconds)
+            if error:
+                self.errors[op][error] += 1
+
+    def report(self, wall: float) -> dict:
+        operations = {}
+        for op, values in sorted(self.latencies.items()):
+            ordered = sorted(values)
+            errors = dict(self.errors.get(op, {}))
+            operations[op] = {
+                "count": len(ordered),
+                "errors": sum(errors.values()),
+                "error_breakdown": errors,
+                "throughput_per_s": round(len(ordered) / wall, 3) if wall else 0.0,
+                "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+                "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+                "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+                "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+                "max_ms": round(ordered[-1] * 1000, 2),
+            }
+        return operations
+
+
+def reply_error(data: dict) -> str | None:
+    """Maps ChatManager's error replies (it never raises) onto error kinds."""
+    text = data.get("response", "")
+    if text.startswith("Request failed: "):
+        return "http_" + text.split(": ", 1)[1].split()[0]
+    if text.startswith("Request timeout"):
+        return "timeout"
+    if text.startswith("Connection error"):
+        return "connection"
+    return None
+
+
+def simulate_user(manager, recorder: Recorder, index: int, turns: int, stream: bool) -> None:
+    user = SimpleNamespace(id=f"bench-{index}", email=f"bench{index}@example.com")
+
+    def timed(op, func, is_error):
+        started = time.perf_counter()
+        try:
+            result = func()
+            error = is_error(result)
+        except Exception as exc:  # noqa: BLE001
+            result, error = None, type(exc).__name__
+        recorder.record(op, time.perf_counter() - started, error)
+        return result
+
+    sessions = timed("get_session_list", lambda: manager.get_session_list(user.email),
+                     lambda r: None if r else "empty")
+    session_id = sessions[0]["session_id"] if sessions else None
+    if session_id:
+        timed("get_history_page", lambda: manager.get_history_page(user.email, session_id),
+              lambda page: None if page.total else "empty")
+
+    for turn in range(turns):
+        prompt = f"bench question {turn} from user {index}"
+        if stream:
+            def send():
+                reply = manager.stream_message(prompt, session_id, user)
+                for _ in reply:
+                    pass
+                return reply.data
+        else:
+            def send():
+                return manager.send_message(prompt, session_id, user)
+        data = timed("stream_message" if stream else "send_message", send, reply_error)
+        if data and data.get("sessionId"):
+            session_id = data["sessionId"]
+
+    timed("get_session_list", lambda: manager.get_session_list(user.email), lambda r: None if r else "empty")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20, help="simulated concurrent users")
+    parser.add_argument("--turns", type=int, default=3, help="messages each user sends")
+    parser.add_argument("--stream", action="store_true", help="use stream_message instead of send_message")
+    parser.add_argument("--no-cache", action="store_true", help="disable ChatManager's session/history caches")
+    parser.add_argument("--base-url", help="webhook base of a running stand-in, e.g. http://127.0.0.1:5679/webhook")
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    fake_n8n.add_arguments(parser)
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        server = fake_n8n.serve("127.0.0.1", 0, fake_n8n.from_args(args))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}/webhook"
+        os.environ.setdefault("N8N_ACCEPT_MSGPACK", "true")  # the stand-in can answer msgpack
+
+    # Config is read at import time, so the environment must be set before importing src.
+    os.environ.update({
+        "N8N_WEBHOOK_URL": f"{base_url}/chat",
+        "N8N_GET_HISTORY_URL": f"{base_url}/get-history",
+        "N8N_GET_SESSIONS_URL": f"{base_url}/get-sessions",
+    })
+    if args.no_cache:
+        os.environ["CHAT_CACHE_SIZE"] = "0"
+    from src.chat import ChatManager
+
+    manager = ChatManager()
+    recorder = Recorder()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as pool:
+        for index in range(args.users):
+            pool.submit(simulate_user, manager, recorder, index, args.turns, args.stream)
+    wall = time.perf_counter() - started
+
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key != "out"},
+        "wall_seconds": round(wall, 3),
+        "operations": recorder.report(wall),
+        "cache": manager.cache_stats(),
+        "transport": manager.transport.pool_stats(),
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+    if server:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""Measures per-session memory of chat history: raw n8n message dicts vs MessageStore.
+
+    python -m bench.memory_bench --sessions 200 --messages 120 --out memory_output.json
+
+Each simulated browser session holds one decoded history page, shaped like the
+LangChain documents n8n's chat memory stores. Memory is measured with tracemalloc
+and reported per session, as JSON for run-to-run comparison.
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+
+
+def langchain_message(i: int, chars: int) -> dict:
+    """One stored message, with the extra fields LangChain serializes alongside the text."""
+    data = {
+        "content": f"message {i} " + "".join(random.choices("abcdefghij klmnop", k=chars)),
+        "additional_kwargs": {},
+        "response_metadata": {},
+    }
+    if i % 2:
+        data.update(tool_calls=[], invalid_tool_calls=[])
+    return {"type": "ai" if i % 2 else "human", "data": data}
+
+
+def measure(build) -> tuple[int, object]:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = build()
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used, held
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200, help="concurrent browser sessions")
+    parser.add_argument("--messages", type=int, default=120, help="messages in each loaded history")
+    parser.add_argument("--content-chars", type=int, default=400, help="mean characters per message")
+    parser.add_argument("--limit", type=int, default=200, help="MESSAGE_RESIDENT_LIMIT")
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    os.environ["MESSAGE_RESIDENT_LIMIT"] = str(args.limit)
+    from src.chat import HistoryPage
+    from src.messages import MessageStore
+
+    random.seed(0)
+    # Every session decodes its own response, so nothing is shared between them.
+    bodies = [
+        json.dumps([langchain_message(i, args.content_chars) for i in range(args.messages)])
+        for _ in range(args.sessions)
+    ]
+
+    raw_bytes, raw = measure(lambda: [json.loads(body) for body in bodies])
+    del raw
+
+    def load_store(body: str) -> MessageStore:
+        messages = json.loads(body)
+        return MessageStore.from_page(HistoryPage(0, len(messages), messages))
+
+    # The decoded dicts are garbage once the store is built; only what it keeps is counted.
+    store_bytes, stores = measure(lambda: [load_store(body) for body in bodies])
+
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key != "out"},
+        "python": sys.version.split()[0],
+        "dict_history": {
+            "total_bytes": raw_bytes,
+            "per_session_bytes": raw_bytes // args.sessions,
+        },
+        "message_store": {
+            "total_bytes": store_bytes,
+            "per_session_bytes": store_bytes // args.sessions,
+            "resident_messages": len(stores[0]),
+            "nbytes_estimate": stores[0].nbytes(),
+        },
+        "reduction": round(1 - store_bytes / raw_bytes, 3) if raw_bytes else 0.0,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
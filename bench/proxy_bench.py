@@ -0,0 +1,107 @@
+"""Caching proxy against a stub upstream: warm, hit, outage and recovery phases.
+
+    python -m bench.proxy_bench --paths 20 --clients 8 --down hang --out proxy_output.json
+
+Starts bench/fake_upstream.py in-process and drives `CachingProxy.handle` from
+`--clients` threads. After warming, every entry is marked expired and the upstream
+goes down (`--down error` or `hang`). Each phase reports proxy latency, X-Cache
+states and how many requests reached the upstream. During the outage, expired
+entries should come back STALE in milliseconds with at most one background
+revalidation per path per backoff.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from bench import fake_upstream
+from bench.load_test import percentile
+
+
+def run_phase(proxy, upstream, paths: list[str], clients: int, rounds: int) -> dict:
+    before = upstream.total()
+    timings, states, statuses = [], Counter(), Counter()
+    lock = threading.Lock()
+
+    def fetch(path):
+        started = time.perf_counter()
+        status, _, _, state = proxy.handle(path)
+        with lock:
+            timings.append(time.perf_counter() - started)
+            states[state] += 1
+            statuses[status] += 1
+
+    with ThreadPoolExecutor(clients) as pool:
+        list(pool.map(fetch, paths * rounds))
+    # Count the background revalidations this phase started, too.
+    while any(thread.name == "proxy-revalidate" for thread in threading.enumerate()):
+        time.sleep(0.01)
+    timings.sort()
+    return {
+        "requests": len(timings),
+        "upstream_requests": upstream.total() - before,
+        "cache_states": dict(states),
+        "statuses": dict(statuses),
+        "p50_ms": round(percentile(timings, 50) * 1000, 2),
+        "p99_ms": round(percentile(timings, 99) * 1000, 2),
+        "max_ms": round(timings[-1] * 1000, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--paths", type=int, default=20, help="distinct upstream paths")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent callers")
+    parser.add_argument("--rounds", type=int, default=5, help="requests per path per phase")
+    parser.add_argument("--upstream-timeout", type=float, default=2.0, help="proxy's upstream timeout")
+    parser.add_argument("--backoff", type=float, default=1.0, help="PROXY_REVALIDATE_BACKOFF for the run")
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    fake_upstream.add_arguments(parser)
+    args = parser.parse_args()
+
+    from src.proxy import CachingProxy
+
+    upstream = fake_upstream.FakeUpstream(args.latency, args.jitter, args.error_rate,
+                                          hang=args.upstream_timeout * 2)
+    server = fake_upstream.serve("127.0.0.1", 0, upstream)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    proxy = CachingProxy(
+        upstreams={"jikan": base}, rate=1000, burst=1000, revalidate_backoff=args.backoff,
+        client=httpx.Client(timeout=args.upstream_timeout),
+    )
+    paths = [f"/jikan/v4/anime/{i}/news" for i in range(args.paths)]
+
+    report = {"config": {key: value for key, value in vars(args).items() if key != "out"}, "phases": {}}
+    phases = report["phases"]
+    phases["warm"] = run_phase(proxy, upstream, paths, args.clients, 1)
+    phases["hit"] = run_phase(proxy, upstream, paths, args.clients, args.rounds)
+
+    # Everything expires while the upstream is down.
+    for entry in list(proxy.cache.values()):
+        entry.expires_at = 0.0
+    upstream.down = args.down or "error"
+    phases["outage"] = run_phase(proxy, upstream, paths, args.clients, args.rounds)
+    phases["outage_cold_miss"] = run_phase(proxy, upstream, ["/jikan/v4/anime/999999/news"], 1, 1)
+
+    upstream.down = None
+    time.sleep(args.backoff)
+    phases["recovery"] = run_phase(proxy, upstream, paths, args.clients, 1)
+    phases["recovered"] = run_phase(proxy, upstream, paths, args.clients, args.rounds)
+    report["proxy_stats"] = proxy.stats
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""Offline evaluation of the pre-router against a labeled prompt fixture.
+
+    python -m bench.router_eval --supervisor-ms 1500 --out router_output.json
+
+Each fixture line is {"prompt", "route", "prior_turns"}, where route is the path
+the Supervisor should take ("anime", "manga", "season_now", "season") or
+"supervisor" when the prompt needs its judgement. A hint counts as correct when it
+names the expected route; prompts left without a hint just cost the usual
+Supervisor hop. The latency estimate assumes every correct hint saves one
+Supervisor LLM call and every wrong one costs a misrouted sub-agent turn.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+from bench.load_test import percentile
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "router_fixture.jsonl")
+
+
+def evaluate(rows: list[dict], threshold: float, classify) -> dict:
+    hinted = correct = 0
+    confusion: Counter = Counter()
+    misses = []
+    for row in rows:
+        route = classify(row["prompt"], row.get("prior_turns", 0))
+        predicted = route.name if route.name and route.confidence >= threshold else "supervisor"
+        confusion[f"{row['route']}->{predicted}"] += 1
+        if predicted != "supervisor":
+            hinted += 1
+            correct += predicted == row["route"]
+        if predicted != row["route"]:
+            misses.append({"prompt": row["prompt"], "expected": row["route"], "predicted": predicted,
+                           "confidence": route.confidence})
+    routable = sum(1 for row in rows if row["route"] != "supervisor")
+    return {
+        "threshold": threshold,
+        "coverage": round(hinted / len(rows), 3),
+        "precision": round(correct / hinted, 3) if hinted else 0.0,
+        "recall": round(correct / routable, 3) if routable else 0.0,
+        "misroutes": hinted - correct,
+        "confusion": dict(sorted(confusion.items())),
+        "misses": misses,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixture", default=FIXTURE)
+    parser.add_argument("--threshold", type=float, help="ROUTER_MIN_CONFIDENCE to evaluate (default: Config)")
+    parser.add_argument("--supervisor-ms", type=float, default=1500, help="latency of one Supervisor LLM call")
+    parser.add_argument("--misroute-ms", type=float, default=3000, help="cost of answering via the wrong agent")
+    parser.add_argument("--repeat", type=int, default=200, help="classifier timing passes over the fixture")
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    from src.config import Config
+    from src.router import classify
+
+    with open(args.fixture) as fh:
+        rows = [json.loads(line) for line in fh if line.strip()]
+    threshold = Config.ROUTER_MIN_CONFIDENCE if args.threshold is None else args.threshold
+
+    timings = []
+    for _ in range(args.repeat):
+        for row in rows:
+            started = time.perf_counter()
+            classify(row["prompt"], row.get("prior_turns", 0))
+            timings.append(time.perf_counter() - started)
+    timings.sort()
+
+    result = evaluate(rows, threshold, classify)
+    correct = result["coverage"] * result["precision"] * len(rows)
+    saved_ms = (correct * args.supervisor_ms - result["misroutes"] * args.misroute_ms) / len(rows)
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key != "out"},
+        "prompts": len(rows),
+        **result,
+        "classify_us": {
+            "mean": round(sum(timings) / len(timings) * 1e6, 2),
+            "p50": round(percentile(timings, 50) * 1e6, 2),
+            "p99": round(percentile(timings, 99) * 1e6, 2),
+        },
+        "est_saved_ms_per_turn": round(saved_ms, 1),
+        "threshold_sweep": [
+            {key: value for key, value in evaluate(rows, t / 100, classify).items() if key in
+             ("threshold", "coverage", "precision", "recall", "misroutes")}
+            for t in range(50, 100, 5)
+        ],
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,348 @@
+"""Per-turn Streamlit script time of the chat page, driven over the app's websocket.
+
+    python -m bench.ui_bench --turns 6 --chat-latency 0.5 --out ui_output.json
+
+Starts bench/fake_n8n and a stand-in Supabase auth endpoint in-process, runs
+`streamlit run main.py` against them, logs in and sends prompts the way the
+browser does: a widget trigger reruns only the fragment that owns the widget, and
+every `run_every` fragment the app declares is re-requested on a timer until the
+next full run, which is when Streamlit's frontend clears those timers. Per turn,
+it reports the script runs the prompt caused (full or fragment) with their time as
+seen from the client, plus the `streamlit_run_seconds` sums scraped from the app's
+/metrics endpoint. A turn lasts until its reply is shown plus `--grace` seconds for
+the runs that follow it. The first turn of a new chat creates a session; later
+turns stay in it. An idle phase afterwards counts the runs an open tab keeps making.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import jwt
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ClientState_pb2 import ClientState
+from streamlit.proto.Common_pb2 import ChatInputValue
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from tornado.websocket import websocket_connect
+
+from bench import fake_n8n
+
+JWT_SECRET = "ui-bench-secret"
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class FakeAuthHandler(BaseHTTPRequestHandler):
+    """Just enough of Supabase's GoTrue API for password logins and user lookups."""
+
+    protocol_version = "HTTP/1.1"
+
+    def _user(self, email: str) -> dict:
+        return {"id": str(uuid.uuid5(uuid.NAMESPACE_DNS, email)), "aud": "authenticated", "role": "authenticated",
+                "email": email, "app_metadata": {}, "user_metadata": {}, "created_at": "2024-01-01T00:00:00Z"}
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        user = self._user(body.get("email", "bench@example.com"))
+        now = int(time.time())
+        token = jwt.encode({"sub": user["id"], "aud": "authenticated", "email": user["email"],
+                            "iat": now, "exp": now + 3600}, JWT_SECRET, algorithm="HS256")
+        self._send({"access_token": token, "token_type": "bearer", "expires_in": 3600,
+                    "expires_at": now + 3600, "refresh_token": uuid.uuid4().hex, "user": user})
+
+    def do_GET(self) -> None:
+        claims = jwt.decode(self.headers.get("Authorization", "").removeprefix("Bearer "), JWT_SECRET,
+                            algorithms=["HS256"], audience="authenticated")
+        self._send(self._user(claims["email"]))
+
+    def _send(self, obj) -> None:
+        data = json.dumps(obj).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+class Tab:
+    """One browser tab: a websocket session that reruns the script like the frontend does."""
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.page_hash = ""
+        self.widgets: dict[str, tuple[str, str]] = {}
+        self.texts: list[str] = []
+        self.runs: list[dict] = []
+        self.current: dict | None = None
+        self.timers: list[asyncio.Task] = []
+        self.timer_count = 0
+        self.changed = asyncio.Event()
+
+    async def connect(self) -> None:
+        self.ws = await websocket_connect(self.url, max_message_size=64 * 1024 * 1024)
+        asyncio.get_running_loop().create_task(self._read())
+        self.rerun()
+
+    def rerun(self, fragment_id: str = "", widgets=(), auto: bool = False) -> None:
+        state = ClientState(query_string="", page_script_hash=self.page_hash, fragment_id=fragment_id,
+                            is_auto_rerun=auto)
+        state.widget_states.widgets.extend(widgets)
+        self.ws.write_message(BackMsg(rerun_script=state).SerializeToString(), binary=True)
+
+    def click(self, label: str) -> None:
+        widget_id, fragment_id = self.widgets[label]
+        self.rerun(fragment_id, [WidgetState(id=widget_id, trigger_value=True)])
+
+    def send_prompt(self, prompt: str) -> None:
+        widget_id, fragment_id = self.widgets["chat_input"]
+        self.rerun(fragment_id, [WidgetState(id=widget_id, chat_input_value=ChatInputValue(data=prompt))])
+
+    def log_in(self, email: str, password: str) -> None:
+        states = [WidgetState(id=self.widgets["Email"][0], string_value=email),
+                  WidgetState(id=self.widgets["Password"][0], string_value=password),
+                  WidgetState(id=self.widgets["Login"][0], trigger_value=True)]
+        self.rerun("", states)
+
+    async def _read(self) -> None:
+        while (raw := await self.ws.read_message()) is not None:
+            msg = ForwardMsg.FromString(raw)
+            kind = msg.WhichOneof("type")
+            if kind == "new_session":
+                fragments = list(msg.new_session.fragment_ids_this_run)
+                self.page_hash = msg.new_session.page_script_hash or self.page_hash
+                if not fragments:
+                    # A full run: the frontend clears every fragment timer (cleanupAutoReruns).
+                    for timer in self.timers:
+                        timer.cancel()
+                    self.timers.clear()
+                    self.widgets.clear()
+                self.current = {"kind": "fragment" if fragments else "full", "started": time.perf_counter()}
+            elif kind == "script_finished" and self.current is not None:
+                self.current["seconds"] = time.perf_counter() - self.current["started"]
+                self.runs.append(self.current)
+                self.current = None
+            elif kind == "auto_rerun":
+                # Like the frontend, every declaration of a run_every fragment adds a timer.
+                self.timer_count += 1
+                self.timers.append(asyncio.get_running_loop().create_task(
+                    self._timer(msg.auto_rerun.fragment_id, msg.auto_rerun.interval)))
+            elif kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                self._element(msg.delta.new_element, msg.delta.fragment_id)
+            self.changed.set()
+
+    def _element(self, element, fragment_id: str) -> None:
+        kind = element.WhichOneof("type")
+        if kind == "chat_input":
+            self.widgets["chat_input"] = (element.chat_input.id, fragment_id)
+        elif kind in ("button", "text_input"):
+            widget = getattr(element, kind)
+            self.widgets.setdefault(widget.label, (widget.id, fragment_id))
+        elif kind == "markdown":
+            self.texts.append(element.markdown.body)
+
+    async def _timer(self, fragment_id: str, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            self.rerun(fragment_id, auto=True)
+
+    async def wait_for(self, predicate, timeout: float = 30.0) -> None:
+        deadline = time.monotonic() + timeout
+        while not predicate():
+            self.changed.clear()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("the app did not reach the expected state")
+            try:
+                await asyncio.wait_for(self.changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    async def settle(self, quiet: float) -> None:
+        """Waits until no script run has started or finished for `quiet` seconds."""
+        while True:
+            count = len(self.runs)
+            await asyncio.sleep(quiet)
+            if self.current is None and len(self.runs) == count:
+                return
+
+
+def cpu_seconds(pid: int) -> float | None:
+    """User + system CPU time of a process (Linux /proc only)."""
+    try:
+        with open(f"/proc/{pid}/stat") as fh:
+            fields = fh.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def scrape(metrics_url: str | None) -> dict:
+    """streamlit_run_seconds sum and count per scope, all outcomes together."""
+    if not metrics_url:
+        return {}
+    totals: dict[str, list] = {}
+    for line in httpx.get(metrics_url).text.splitlines():
+        for suffix, index in (("_sum{", 0), ("_count{", 1)):
+            if line.startswith("streamlit_run_seconds" + suffix):
+                scope = line.split('scope="', 1)[1].split('"', 1)[0] if 'scope="' in line else "?"
+                totals.setdefault(scope, [0.0, 0])[index] += float(line.rsplit(" ", 1)[1])
+    return totals
+
+
+def summarize(runs: list[dict], before: dict, after: dict, cpu: tuple = (None, None)) -> dict:
+    kinds = Counter(run["kind"] for run in runs)
+    seconds = Counter()
+    for run in runs:
+        seconds[run["kind"]] += run["seconds"]
+    span = {}
+    for scope, (total, count) in after.items():
+        old_total, old_count = before.get(scope, (0.0, 0))
+        if count - old_count:
+            span[scope] = {"runs": int(count - old_count), "ms": round((total - old_total) * 1000, 2)}
+    return {
+        "runs": dict(kinds),
+        "client_ms": {kind: round(value * 1000, 2) for kind, value in seconds.items()},
+        "client_ms_total": round(sum(seconds.values()) * 1000, 2),
+        "streamlit_run_seconds": span,
+        "app_cpu_ms": round((cpu[1] - cpu[0]) * 1000, 1) if None not in cpu else None,
+    }
+
+
+async def drive(args, url: str, metrics_port: int, pid: int) -> dict:
+    tab = Tab(url)
+    await tab.connect()
+    await tab.wait_for(lambda: "Register or Login" in tab.widgets)
+    await tab.settle(args.quiet)
+    # The app starts its exporter on first import; trees without one get client-side timings only.
+    metrics_url = f"http://127.0.0.1:{metrics_port}/metrics"
+    try:
+        httpx.get(metrics_url)
+    except httpx.TransportError:
+        metrics_url = None
+    tab.click("Register or Login")
+    await tab.wait_for(lambda: "Login" in tab.widgets)
+    await tab.settle(args.quiet)
+    tab.log_in("bench@example.com", "password")
+    await tab.wait_for(lambda: "📝 New Chat" in tab.widgets)
+    await tab.settle(args.quiet)
+    tab.click("📝 New Chat")
+    await tab.settle(args.quiet)
+
+    turns = []
+    for turn in range(args.turns):
+        prompt = f"ui bench prompt {turn} {uuid.uuid4().hex[:6]}"
+        before, runs, cpu = scrape(metrics_url), len(tab.runs), cpu_seconds(pid)
+        started = time.perf_counter()
+        tab.send_prompt(prompt)
+        answer = f"Fake agent answer to: {prompt}"
+        await tab.wait_for(lambda: answer in tab.texts, args.timeout)
+        shown = time.perf_counter() - started
+        await asyncio.sleep(args.grace)
+        await tab.wait_for(lambda: tab.current is None)
+        result = summarize(tab.runs[runs:], before, scrape(metrics_url), (cpu, cpu_seconds(pid)))
+        result["reply_shown_s"] = round(shown, 3)
+        turns.append(result)
+
+    before, runs, timers, cpu = scrape(metrics_url), len(tab.runs), len(tab.timers), cpu_seconds(pid)
+    await asyncio.sleep(args.idle)
+    idle = summarize(tab.runs[runs:], before, scrape(metrics_url), (cpu, cpu_seconds(pid)))
+    idle.update(seconds=args.idle, live_timers=timers)
+    return {"turns": turns, "idle": idle, "timers_declared": tab.timer_count}
+
+
+def mean_turn(turns: list[dict]) -> dict:
+    if not turns:
+        return {}
+    keys = {key for turn in turns for key in turn["client_ms"]}
+    scopes = {scope for turn in turns for scope in turn["streamlit_run_seconds"]}
+    return {
+        "turns": len(turns),
+        "runs": {kind: round(sum(t["runs"].get(kind, 0) for t in turns) / len(turns), 2) for kind in sorted(keys)},
+        "client_ms": {kind: round(sum(t["client_ms"].get(kind, 0) for t in turns) / len(turns), 2)
+                      for kind in sorted(keys)},
+        "client_ms_total": round(sum(t["client_ms_total"] for t in turns) / len(turns), 2),
+        "app_cpu_ms": (round(sum(t["app_cpu_ms"] for t in turns) / len(turns), 1)
+                       if all(t["app_cpu_ms"] is not None for t in turns) else None),
+        "streamlit_run_ms": {scope: round(sum(t["streamlit_run_seconds"].get(scope, {}).get("ms", 0)
+                                              for t in turns) / len(turns), 2) for scope in sorted(scopes)},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=6, help="prompts sent in one chat")
+    parser.add_argument("--idle", type=float, default=10.0, help="seconds to watch an idle tab after the turns")
+    parser.add_argument("--quiet", type=float, default=1.5, help="seconds without runs that count as settled")
+    parser.add_argument("--grace", type=float, default=1.0, help="seconds a turn lasts after its reply is shown")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for each reply")
+    parser.add_argument("--app", default=os.path.join(ROOT, "main.py"), help="Streamlit entry point to run")
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    fake_n8n.add_arguments(parser)
+    args = parser.parse_args()
+
+    n8n = fake_n8n.serve("127.0.0.1", 0, fake_n8n.from_args(args))
+    auth = ThreadingHTTPServer(("127.0.0.1", 0), FakeAuthHandler)
+    for server in (n8n, auth):
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{n8n.server_address[1]}/webhook"
+    port, metrics_port = _free_port(), _free_port()
+    env = dict(os.environ, N8N_WEBHOOK_URL=f"{base}/chat", N8N_GET_HISTORY_URL=f"{base}/get-history",
+               N8N_GET_SESSIONS_URL=f"{base}/get-sessions", SUPABASE_URL=f"http://127.0.0.1:{auth.server_address[1]}",
+               SUPABASE_ANON_KEY="anon", SUPABASE_JWT_SECRET=JWT_SECRET, METRICS_PORT=str(metrics_port),
+               KEEPWARM_ENABLED="false", LOG_LEVEL="WARNING")
+    app = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", os.path.abspath(args.app), "--server.headless=true",
+         f"--server.port={port}", "--server.fileWatcherType=none", "--browser.gatherUsageStats=false"],
+        cwd=os.path.dirname(os.path.abspath(args.app)), env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        for _ in range(300):
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/_stcore/health").status_code == 200:
+                    break
+            except httpx.TransportError:
+                time.sleep(0.1)
+        else:
+            raise RuntimeError("streamlit did not start")
+        result = asyncio.run(drive(args, f"ws://127.0.0.1:{port}/_stcore/stream", metrics_port, app.pid))
+    finally:
+        app.terminate()
+        app.wait()
+        n8n.shutdown()
+        auth.shutdown()
+
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key not in ("out", "app")},
+        "new_session_turn": mean_turn(result["turns"][:1]),
+        "same_session_turns": mean_turn(result["turns"][1:]),
+        "idle": result["idle"],
+        "timers_declared": result["timers_declared"],
+        "turns": result["turns"],
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Bytes on the wire and decode cost of a history page: stored documents vs projected rows.
+
+    python -m bench.wire_bench --messages 200 --out wire_output.json
+
+Compares the workflow's old response (whole LangChain documents) with the
+`fields` projection (`[type, content]` rows), each as plain and gzipped JSON and,
+when msgpack is installed, msgpack. Decode time covers decompression plus parsing;
+decoded bytes are what the parsed page holds in memory (tracemalloc).
+"""
+import argparse
+import gzip
+import json
+import random
+import sys
+import time
+
+from bench.memory_bench import langchain_message, measure
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+def timed(decode, body: bytes, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        decode(body)
+    return (time.perf_counter() - started) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=200, help="messages in the history page")
+    parser.add_argument("--content-chars", type=int, default=400, help="mean characters per message")
+    parser.add_argument("--repeat", type=int, default=50, help="decode passes per format")
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    from src.wire import HISTORY_FIELDS
+
+    random.seed(0)
+    documents = [langchain_message(i, args.content_chars) for i in range(args.messages)]
+    rows = [[m["type"], m["data"]["content"]] for m in documents]
+    pages = {
+        "documents": {"messages": documents, "start": 0, "total": len(documents)},
+        "rows": {"fields": list(HISTORY_FIELDS), "messages": rows, "start": 0, "total": len(rows)},
+    }
+
+    report = {"config": {key: value for key, value in vars(args).items() if key != "out"}, "formats": {}}
+    for shape, page in pages.items():
+        encodings = {"json": (json.dumps(page).encode(), json.loads)}
+        if msgpack:
+            encodings["msgpack"] = (msgpack.packb(page), lambda body: msgpack.unpackb(body, raw=False))
+        for name, (body, parse) in encodings.items():
+            zipped = gzip.compress(body, compresslevel=6)
+            decoded_bytes, _ = measure(lambda: parse(body))
+            report["formats"][f"{shape}/{name}"] = {
+                "wire_bytes": len(body),
+                "gzip_wire_bytes": len(zipped),
+                "decode_us": round(timed(parse, body, args.repeat) * 1e6, 1),
+                "gzip_decode_us": round(timed(lambda b: parse(gzip.decompress(b)), zipped, args.repeat) * 1e6, 1),
+                "decoded_bytes": decoded_bytes,
+            }
+    baseline = report["formats"]["documents/json"]
+    projected = report["formats"]["rows/json"]
+    report["rows_vs_documents"] = {
+        "wire": round(1 - projected["wire_bytes"] / baseline["wire_bytes"], 3),
+        "gzip_wire": round(1 - projected["gzip_wire_bytes"] / baseline["gzip_wire_bytes"], 3),
+        "decode": round(1 - projected["decode_us"] / baseline["decode_us"], 3),
+        "decoded_bytes": round(1 - projected["decoded_bytes"] / baseline["decoded_bytes"], 3),
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+import re
+import threading
+import time
+import unicodedata
+from cachetools import LRUCache
+from .config import Config
+
+
+# Words dropped before matching, so "show me the top anime please" keys like "top anime".
+FILLER_WORDS = {
+    "a", "an", "the", "me", "us", "please", "pls", "plz", "can", "could", "you", "u", "show",
+    "give", "tell", "list", "what", "whats", "which", "are", "is", "some", "of", "i", "want",
+    "to", "know", "see", "get", "any", "about", "for", "right", "now", "currently", "hi", "hey",
+}
+
+# (class, pattern over the filler-free key, seconds an answer stays fresh). A prompt is only
+# context-free when the WHOLE key matches, so "top anime like it" never hits the cache.
+CONTEXT_FREE_CLASSES = [
+    ("top_anime", re.compile(r"(top|best)( \d{1,2})? anime( (ranking|rankings|of all time|ever))?"), 6 * 3600),
+    ("top_manga", re.compile(r"(top|best)( \d{1,2})? manga( (ranking|rankings|of all time|ever))?"), 6 * 3600),
+    ("season_now", re.compile(r"(anime )?(this|current|latest|airing) season( anime)?|(seasonal|airing) anime"), 3600),
+    ("season", re.compile(r"(anime )?(spring|summer|fall|autumn|winter) \d{4}( anime| season)?"), 24 * 3600),
+]
+
+
+def normalize(prompt: str) -> str:
+    """Lowercases, strips punctuation and filler words, and collapses whitespace."""
+    text = unicodedata.normalize("NFKC", prompt).lower()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(word for word in text.split() if word not in FILLER_WORDS)
+
+
+def classify(prompt: str) -> tuple[str, str, int] | None:
+    """Returns (class, normalized key, ttl) for a context-free prompt, else None."""
+    key = normalize(prompt)
+    for name, pattern, ttl in CONTEXT_FREE_CLASSES:
+        if pattern.fullmatch(key):
+            return name, key, ttl
+    return None
+
+
+class AnswerCache:
+    """Process-wide cache of agent answers to repeated, context-free questions."""
+
+    def __init__(self, maxsize: int) -> None:
+        self._data = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.saved_seconds = 0.0
+
+    def lookup(self, prompt: str, prior_turns: int) -> tuple[str | None, tuple | None]:
+        """Returns (cached answer, store key); the key is None when the prompt must not be cached."""
+        info = classify(prompt)
+        with self._lock:
+            if info is None or prior_turns > 0:
+                self.bypassed += 1
+                return None, None
+            key = info[:2]
+            entry = self._data.get(key)
+            if entry and entry[1] > time.time():
+                self.hits += 1
+                self.saved_seconds += entry[2]
+                return entry[0], key
+            self.misses += 1
+            return None, key
+
+    def store(self, key: tuple, ttl: int, answer: str, latency: float) -> None:
+        with self._lock:
+            self._data[key] = (answer, time.time() + ttl, latency)
+
+    def ttl_for(self, key: tuple) -> int:
+        return next(ttl for name, _, ttl in CONTEXT_FREE_CLASSES if name == key[0])
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "saved_seconds": round(self.saved_seconds, 3),
+                "size": len(self._data),
+            }
+
+
+answer_cache = AnswerCache(Config.ANSWER_CACHE_SIZE)
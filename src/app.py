@@ -1,15 +1,24 @@
 import streamlit as st
 import uuid
 from .config import Config
-from .auth import Auth, AuthError
+from .auth import Auth, AuthError, AuthUnavailableError
 from .chat import ChatManager
-from .database import Database
+from .jobs import Job, QueueBusyError
+from .messages import Message, MessageStore
+from .metrics import configure_logging, span, start_exporters
 
 Config.validate()
+configure_logging()
+start_exporters()
 
-auth = Auth()
 chat_manager = ChatManager()
-db = Database()
+
+
+def _auth() -> Auth:
+    """Auth bound to this browser session's own Supabase auth context."""
+    if 'auth_context' not in st.session_state:
+        st.session_state.auth_context = uuid.uuid4().hex
+    return Auth(st.session_state.auth_context)
 
 
 # --- Authentication Page ---
@@ -24,13 +33,11 @@ def auth_page() -> None:
         if st.button("Login") and email and password:
             try:
                 with st.spinner("Logging in..."):
-                    resp = auth.sign_in(email, password)
+                    resp = _auth().sign_in(email, password)
                 if getattr(resp, 'user', None):
+                    # The session's own auth context already holds the new tokens.
                     st.session_state.user = resp.user
-                    # Update Supabase client session
-                    auth.db.client.auth.set_session(resp.session.access_token, resp.session.refresh_token)
-                    st.session_state.session_id = None
-                    st.session_state.chat_history = []
+                    _load_session(None)
                     st.session_state.initial_load_done = False
                     st.session_state.page = 'chat'  # Ensure redirect to chat page
                     st.success("Login successful!")
@@ -51,14 +58,8 @@ def auth_page() -> None:
                 st.error("Passwords do not match")
             else:
                 try:
-                    with st.spinner("Checking email availability..."):
-                        # First check if email already exists
-                        if auth.check_email_exists(email):
-                            st.error("This email is already registered. Please use a different email or try logging in.")
-                            st.stop()  # Stop further execution
-                    
                     with st.spinner("Registering..."):
-                        resp = auth.sign_up(email, password)
+                        resp = _auth().sign_up(email, password)
                     if getattr(resp, 'user', None):
                         st.success("Registration successful! Please check your email to verify your account.")
                     else:
@@ -76,6 +77,29 @@ def auth_page() -> None:
 
 
 # --- Chat Page ---
+def _load_session(session_id: str | None, page=None) -> None:
+    """Switches the chat pane to a session, loading only its newest page of messages."""
+    st.session_state.session_id = session_id
+    st.session_state.chat_history = MessageStore()
+    st.session_state.visible_count = Config.HISTORY_PAGE_SIZE
+    # A reply still running for the previous session lands in its cache, not in this pane.
+    st.session_state.pending_job = None
+    if session_id and st.session_state.user:
+        if page is None:
+            page = chat_manager.get_history_page(
+                username=getattr(st.session_state.user, 'email', ''),
+                session_id=session_id
+            )
+        st.session_state.chat_history = MessageStore.from_page(page)
+
+
+def _clear_login() -> None:
+    """Forgets the user and everything loaded for them, leaving an empty anonymous chat."""
+    st.session_state.user = None
+    _load_session(None)
+    st.session_state.initial_load_done = False
+
+
 def chat_page() -> None:
     CUSTOM_CSS = """
     <style>
@@ -142,109 +166,238 @@ def chat_page() -> None:
     st.caption(Config.APP_DESCRIPTION)
 
     with st.sidebar:
-        if not st.session_state.user:
-            st.info("💡 Login to automatically save and display chat history")
-            if st.button("Register or Login"):
-                st.session_state.page = 'auth'
-                st.rerun()
-        
+        # A healthy backend is shown as of this run; only a recovering one is polled.
+        status = chat_manager.backend_status()
+        if status["state"] == "closed":
+            _show_backend_status(status)
         else:
-            st.success(f"🕊️ {getattr(st.session_state.user, 'email', '')}")
-            
-            col1, col2 = st.columns(2)
-            with col1:
-                if st.button("📝 New Chat", use_container_width=True):
-                    st.session_state.session_id = None
-                    st.session_state.chat_history = []
-                    st.rerun()
-            with col2:
-                if st.button("🚪 Logout", use_container_width=True):
-                    auth.sign_out()
-                    st.session_state.user = None
-                    st.session_state.session_id = None
-                    st.session_state.chat_history = []
-                    st.session_state.initial_load_done = False
-                    st.rerun()
-            
-            st.markdown("---")
-            st.markdown("#### Chat History")
-            
-            sessions = chat_manager.get_session_list(getattr(st.session_state.user, 'email', ''))
-            if not sessions:
-                st.info("No chat history available")
-            else:
-                sessions.sort(key=lambda x: x.get("session_id", ""), reverse=True)
-                for session in sessions:
-                    session_title = session.get("title", session.get("session_id", "Chat"))
-                    
-                    is_active = (session["session_id"] == st.session_state.session_id)
-                    button_type = "primary" if is_active else "secondary"
-                    
-                    if st.button(session_title, key=session["session_id"], use_container_width=True, type=button_type):
-                        st.session_state.session_id = session["session_id"]
-                        st.session_state.chat_history = chat_manager.get_history(
-                            username=getattr(st.session_state.user, 'email', ''),
-                            session_id=st.session_state.session_id
-                        )
-                        st.rerun()
+            backend_status()
+        session_sidebar()
 
     if st.session_state.user and not st.session_state.initial_load_done:
-        sessions = chat_manager.get_session_list(getattr(st.session_state.user, 'email', ''))
-        if sessions:
-            sessions.sort(key=lambda x: x.get("session_id", ""), reverse=True)
-            latest_session_id = sessions[0].get("session_id")
-            if latest_session_id:
-                st.session_state.session_id = latest_session_id
-                st.session_state.chat_history = chat_manager.get_history(
-                    username=getattr(st.session_state.user, 'email', ''),
-                    session_id=latest_session_id
-                )
+        # Session list and newest history load concurrently; other recent sessions prefetch in the background.
+        sessions, page = chat_manager.load_initial(getattr(st.session_state.user, 'email', ''))
+        if page is not None:
+            _load_session(sessions[0].get("session_id"), page)
         st.session_state.initial_load_done = True
         st.rerun()
 
-    for msg in st.session_state.chat_history:
-        role = 'user' if msg.get("type") == "human" else 'assistant'
-        with st.chat_message(role):
-            st.write(msg.get("data", {}).get("content", ""))
+    chat_pane()
+
+
+@st.fragment(run_every=Config.HEALTH_STATUS_REFRESH)
+def backend_status() -> None:
+    """n8n backend state while the circuit breaker is open or half-open, refreshed on its own timer."""
+    status = chat_manager.backend_status()
+    if status["state"] == "closed":
+        # Recovered. The browser drops this fragment's timer only on a full run.
+        st.rerun()
+    _show_backend_status(status)
+
+
+def _show_backend_status(status: dict) -> None:
+    if status["state"] == "closed":
+        st.caption("🟢 Backend online")
+    elif status["state"] == "half_open":
+        st.caption("🟡 Backend waking up, checking...")
+    else:
+        st.caption(f"🔴 Backend unavailable ({status['last_error']}), retrying in {status['retry_in']:.0f}s")
+
+
+@st.fragment
+def session_sidebar() -> None:
+    """Session list; rebuilt on full reruns only, i.e. when the active or listed sessions change."""
+    if not st.session_state.user:
+        st.info("💡 Login to automatically save and display chat history")
+        if st.button("Register or Login"):
+            st.session_state.page = 'auth'
+            st.rerun()
+        return
+
+    st.success(f"🕊️ {getattr(st.session_state.user, 'email', '')}")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("📝 New Chat", use_container_width=True):
+            _load_session(None)
+            st.rerun()
+    with col2:
+        if st.button("🚪 Logout", use_container_width=True):
+            _auth().sign_out()
+            _clear_login()
+            st.rerun()
+
+    st.markdown("---")
+    st.markdown("#### Chat History")
+
+    sessions = chat_manager.get_session_page(
+        getattr(st.session_state.user, 'email', ''), limit=st.session_state.session_list_limit
+    )
+    if not sessions.items:
+        st.info("No chat history available")
+        return
+
+    for session in sessions.items:
+        session_title = session.title
+
+        is_active = (session.session_id == st.session_state.session_id)
+        button_type = "primary" if is_active else "secondary"
+
+        if st.button(session_title, key=session.session_id, use_container_width=True, type=button_type):
+            if is_active:
+                # Already showing this session: only pull messages stored since.
+                page = chat_manager.get_history_since(
+                    username=getattr(st.session_state.user, 'email', ''),
+                    session_id=st.session_state.session_id,
+                    index=st.session_state.chat_history.end
+                )
+                st.session_state.chat_history.append_page(page)
+            else:
+                _load_session(session.session_id)
+            st.rerun()
+
+    if sessions.has_more:
+        if st.button("More chats", key="more_sessions", use_container_width=True):
+            st.session_state.session_list_limit += Config.SESSION_PAGE_SIZE
+            st.rerun(scope="fragment")
+
+
+def _render_messages(messages) -> None:
+    for msg in messages:
+        with st.chat_message('user' if msg.is_user else 'assistant'):
+            st.write(msg.content)
+
+
+@st.fragment
+def chat_pane() -> None:
+    """Conversation view; sending a message reruns only this fragment, not the whole script."""
+    with span("streamlit_run", scope="fragment"):
+        _chat_pane()
+
+
+def _chat_pane() -> None:
+    # Render only the newest window of messages; older ones load on demand.
+    history = st.session_state.chat_history
+    visible = history.newest(st.session_state.visible_count)
+    if history.has_older or len(visible) < len(history):
+        if st.button("⬆️ Load older messages", key="load_older"):
+            if len(visible) == len(history):
+                page = chat_manager.get_history_page(
+                    username=getattr(st.session_state.user, 'email', ''),
+                    session_id=st.session_state.session_id,
+                    before=history.start
+                )
+                history.prepend_page(page)
+            st.session_state.visible_count = min(st.session_state.visible_count + Config.HISTORY_PAGE_SIZE, history.limit)
+            st.rerun(scope="fragment")
+
+    with span("streamlit_render", part="history"):
+        _render_messages(visible)
+
+    if history.has_newer:
+        # Scrolling far back evicted the newest messages from memory.
+        if st.button("⬇️ Load newer messages", key="load_newer"):
+            history.append_page(chat_manager.get_history_since(
+                username=getattr(st.session_state.user, 'email', ''),
+                session_id=st.session_state.session_id,
+                index=history.end
+            ))
+            st.session_state.visible_count = Config.HISTORY_PAGE_SIZE
+            st.rerun(scope="fragment")
 
     if prompt := st.chat_input("Enter your question..."):
         if not st.session_state.user and not st.session_state.session_id:
             st.session_state.session_id = f"web_anon_{uuid.uuid4().hex}"
+        try:
+            # The turn runs in the background; this script thread is free again right away.
+            job = chat_manager.submit_message(
+                prompt, st.session_state.session_id, st.session_state.user,
+                prior_turns=st.session_state.chat_history.total
+            )
+            st.session_state.pending_job = job.id
+        except QueueBusyError as e:
+            st.warning(str(e))
 
-        with st.chat_message("user"):
-            st.write(prompt)
-        
-        with st.spinner("🤖 Thinking..."):
-            response_data = chat_manager.send_message(prompt, st.session_state.session_id, st.session_state.user)
+    # Declared only while a turn is in flight, so idle tabs never poll.
+    if st.session_state.pending_job is not None:
+        pending_turn()
 
-        ai_text = response_data.get("response", "Sorry, an error occurred while processing.")
-        new_session_id = response_data.get("sessionId")
-
-        if new_session_id:
-            st.session_state.session_id = new_session_id
-        
-        with st.chat_message("assistant"):
-            st.write(ai_text)
-        
-        st.session_state.chat_history.append({"type": "human", "data": {"content": prompt}})
-        st.session_state.chat_history.append({"type": "ai", "data": {"content": ai_text}})
-        
+
+@st.fragment(run_every=Config.JOB_POLL_INTERVAL)
+def pending_turn() -> None:
+    """Shows the in-flight turn as its reply arrives, polling the job instead of blocking on it."""
+    with span("streamlit_run", scope="poll"):
+        _pending_turn()
+
+
+def _pending_turn() -> None:
+    job = chat_manager.get_job(st.session_state.pending_job)
+    if job is None:
+        # Pruned after its result_ttl (e.g. the tab slept through the reply): stop polling.
+        st.session_state.pending_job = None
         st.rerun()
 
+    with st.chat_message("user"):
+        st.write(job.message)
+    with st.chat_message("assistant"):
+        if not job.done:
+            st.write(job.text or ("⏳ Waiting for a free slot..." if job.state == Job.QUEUED else "🤖 Thinking..."))
+            return
+        response_data = job.data
+        ai_text = response_data.get("response", "Sorry, an error occurred while processing.")
+        st.write(ai_text)
+
+    new_session_id = response_data.get("sessionId")
+    if new_session_id:
+        st.session_state.session_id = new_session_id
+
+    st.session_state.chat_history.append([Message("human", job.message), Message("ai", ai_text)])
+    st.session_state.pending_job = None
+    # A full rerun is the only thing that stops the browser's poll timer for this fragment
+    # (Streamlit 1.49 clears fragment timers on full runs only), so it is needed even when
+    # the session did not change: drawing the turn in place instead leaves the timer ticking
+    # for the life of the page, and each tick costs about as much as this one run.
+    st.rerun()
+
 
 # --- Main Application Flow ---
 def main() -> None:
+    with span("streamlit_run", scope="full"):
+        _main()
+
+
+def _main() -> None:
     if 'page' not in st.session_state:
         st.session_state.page = 'chat'
     if 'user' not in st.session_state:
-        current_user_response = auth.get_current_user()
-        st.session_state.user = getattr(current_user_response, 'user', None)
+        st.session_state.user = None
     if 'session_id' not in st.session_state:
         st.session_state.session_id = None
     if 'chat_history' not in st.session_state:
-        st.session_state.chat_history = []
+        st.session_state.chat_history = MessageStore()
     if 'initial_load_done' not in st.session_state:
         st.session_state.initial_load_done = False
+    if 'visible_count' not in st.session_state:
+        st.session_state.visible_count = Config.HISTORY_PAGE_SIZE
+    if 'session_list_limit' not in st.session_state:
+        st.session_state.session_list_limit = Config.SESSION_PAGE_SIZE
+    if 'pending_job' not in st.session_state:
+        st.session_state.pending_job = None
+
+    if st.session_state.user:
+        # Every full rerun re-checks the session's access token (locally, no auth round-trip),
+        # which also keeps its auth context from being evicted as idle while the user is active.
+        try:
+            current_user_response = _auth().get_current_user(remote=False)
+        except AuthUnavailableError:
+            pass  # auth server unreachable: keep the login and check again on the next run
+        else:
+            if getattr(current_user_response, 'user', None) is None:
+                # Rejected token: drop the private session the way Logout does.
+                _auth().release()
+                _clear_login()
+            else:
+                st.session_state.user = current_user_response.user
 
     if st.session_state.page == 'auth':
         auth_page()
@@ -1,53 +1,37 @@
+import logging
+import jwt
 from .database import Database
-from supabase_auth.errors import AuthApiError, AuthError
+from .metrics import registry, span
+from .tokens import verifier
+from supabase_auth.errors import AuthApiError, AuthError, AuthInvalidJwtError, AuthSessionMissingError
+from supabase_auth.types import UserResponse
 
 
-class Auth:
-	def __init__(self) -> None:
-		self.db = Database()
+logger = logging.getLogger(__name__)
 
-	def check_email_exists(self, email: str) -> bool:
-		"""
-		Check if an email is already registered using a sign-in attempt.
-		This is the most reliable method when using an anon key.
-		"""
-		try:
-			"""
-			IMPORTANT: 
-			The Supabase anon key is a public API key, not an authentication token, 
-			and therefore cannot be used to check authentication or 
-			identify a specific user (ex. check unique email).
-			Since this's just a small app, so let it be.
-			"""
-			# Attempting to sign in with a dummy password.
-			# If it raises "Invalid login credentials", the user does not exist.
-			# For other auth errors (like "Email not confirmed"), the user exists.
-			self.db.client.auth.sign_in_with_password({"email": email, "password": "dummy_password"})
-			# If no error is raised, it implies the user exists.
-			return True
-		except AuthApiError as e:
-			# Supabase returns "Invalid login credentials" for non-existent emails.
-			if "invalid login credentials" in str(e).lower():
-				return False  # Email does not exist.
-			# Any other AuthApiError implies the user exists (e.g., "Email not confirmed").
-			return True
-		except Exception:
-			# For any other unexpected error, assume the user exists to be safe.
-			return True
+
+def _rejected(e: Exception) -> bool:
+	"""True when the auth server turned the session down, not when it could not answer."""
+	if isinstance(e, (AuthInvalidJwtError, AuthSessionMissingError)):
+		return True
+	return isinstance(e, AuthApiError) and e.status is not None and 400 <= e.status < 500 and e.status not in (408, 429)
+
+
+class Auth:
+	def __init__(self, context_key: str | None = None) -> None:
+		# Each Streamlit session passes its own key so its login stays isolated.
+		self.db = Database(context_key)
 
 	def sign_up(self, email: str, password: str):
-		# First check if email already exists
-		if self.check_email_exists(email):
-			raise AuthError("This email is already registered. Please use a different email or try logging in.")
-		
+		# One round-trip: Supabase itself reports an existing email, so no separate probe is needed.
 		try:
 			# Attempt to sign up - let Supabase handle the registration
-			result = self.db.client.auth.sign_up({"email": email, "password": password})
-			return result
+			with span("auth_call", op="sign_up"):
+				result = self.db.auth.sign_up({"email": email, "password": password})
 		except AuthApiError as e:
 			error_msg = str(e).lower()
 			# Provide more specific error messages for common registration issues
-			if "email already registered" in error_msg or "email has already been taken" in error_msg:
+			if "already registered" in error_msg or "email has already been taken" in error_msg:
 				raise AuthError("This email is already registered. Please use a different email or try logging in.")
 			elif "password is too weak" in error_msg:
 				raise AuthError("Password is too weak. Please choose a stronger password.")
@@ -57,10 +41,15 @@ class Auth:
 				raise AuthError(f"{e}")
 		except Exception as e:
 			raise AuthError(f"Unexpected error during registration: {e}")
+		# With email confirmation on, Supabase answers an existing email with an identity-less user.
+		if result.user is not None and result.user.identities == []:
+			raise AuthError("This email is already registered. Please use a different email or try logging in.")
+		return result
 
 	def sign_in(self, email: str, password: str):
 		try:
-			return self.db.client.auth.sign_in_with_password({"email": email, "password": password})
+			with span("auth_call", op="sign_in"):
+				return self.db.auth.sign_in_with_password({"email": email, "password": password})
 		except AuthApiError as e:
 			raise AuthError(f"Invalid email or password")
 		except Exception as e:
@@ -68,17 +57,54 @@ class Auth:
 
 	def sign_out(self) -> None:
 		try:
-			self.db.client.auth.sign_out()
+			with span("auth_call", op="sign_out"):
+				self.db.auth.sign_out()
 		except Exception as e:
-			print(f"Error during sign out: {e}")
+			logger.warning("Error during sign out: %s", e)
+		finally:
+			self.db.release()
+
+	def release(self) -> None:
+		"""Drops this session's auth context without calling the auth server."""
+		self.db.release()
+
+	def get_current_user(self, remote: bool = True):
+		"""Returns this session's user, checking the access token locally when it can.
 
-	def get_current_user(self):
+		With `remote=False` a token that cannot be checked locally is accepted as is
+		instead of asking the auth server, so a rerun never waits on the network.
+		Returns None once the token or its refresh is rejected; raises
+		AuthUnavailableError when the auth server could not be reached, so callers
+		keep the session instead of logging the user out.
+		"""
 		try:
-			return self.db.client.auth.get_user()
-		except Exception as e:
-			print(f"Error getting current user: {e}")
+			session = self.db.auth.get_session()
+			if session is None:
+				return None
+			claims = verifier.verify(session.access_token)
+			if claims is not None and session.user and claims.get("sub") == session.user.id:
+				registry.inc("auth_token_checks_total", path="local")
+				return UserResponse(user=session.user)
+			if claims is None and not remote:
+				registry.inc("auth_token_checks_total", path="unchecked")
+				return UserResponse(user=session.user) if session.user else None
+			registry.inc("auth_token_checks_total", path="remote")
+			with span("auth_call", op="get_user"):
+				return self.db.auth.get_user(session.access_token)
+		except jwt.InvalidTokenError as e:
+			logger.warning("Rejected access token: %s", e)
 			return None
+		except Exception as e:
+			if _rejected(e):
+				logger.warning("Auth server rejected the session: %s", e)
+				return None
+			logger.warning("Error getting current user: %s", e)
+			raise AuthUnavailableError(f"Could not check the login: {e}") from e
 
 
 class AuthError(Exception):
 	pass
+
+
+class AuthUnavailableError(AuthError):
+	pass
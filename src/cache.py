@@ -0,0 +1,51 @@
+import threading
+from cachetools import TTLCache
+
+
+class TTLLRUCache:
+    """Thread-safe TTL + LRU cache with hit/miss counters, shared across Streamlit sessions.
+
+    Keys are tuples starting with the username.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.enabled = maxsize > 0 and ttl > 0
+        self._data = TTLCache(maxsize=max(maxsize, 1), ttl=max(ttl, 0.001))
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple):
+        if not self.enabled:
+            return None
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def set(self, key: tuple, value) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._data[key] = value
+
+    def update(self, key: tuple, func) -> None:
+        """Applies `func` to a cached value in place of re-fetching it; no-op on a miss."""
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data[key] = func(value)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._data),
+                "maxsize": self._data.maxsize,
+            }
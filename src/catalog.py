@@ -0,0 +1,365 @@
+"""Local anime/manga catalog that resolves titles to MAL ids without calling Jikan.
+
+The catalog is a pyarrow table (one row per anime or manga) kept in an Arrow IPC
+file at CATALOG_PATH. It is built from Jikan's listing pages (`ingest`) or from a
+JSON snapshot of Jikan entries (`import`), and refreshed incrementally by
+upserting newer pages. In memory, every English, Japanese, romaji and synonym
+title is indexed for exact, prefix and trigram-fuzzy lookup.
+
+    python -m src.catalog import bench/catalog_snapshot.json
+    python -m src.catalog ingest --kind anime --pages 40
+    python -m src.catalog resolve "frieren"
+"""
+import argparse
+import bisect
+import json
+import logging
+import math
+import re
+import sys
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+from urllib.parse import parse_qs
+import httpx
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+from .config import Config
+from .proxy import TokenBucket
+
+
+SCHEMA = pa.schema([
+    ("kind", pa.string()),
+    ("mal_id", pa.int64()),
+    ("title", pa.string()),
+    ("title_english", pa.string()),
+    ("title_japanese", pa.string()),
+    ("synonyms", pa.list_(pa.string())),
+    ("score", pa.float64()),
+    ("members", pa.int64()),
+    ("fetched_at", pa.float64()),
+])
+KINDS = ("anime", "manga")
+TITLE_COLUMNS = ("title", "title_english", "title_japanese")
+PREFIX_SCAN = 50  # most prefix candidates considered per query
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_title(title: str) -> str:
+    """Casefolded, width-normalized title with punctuation collapsed to single spaces."""
+    text = unicodedata.normalize("NFKC", title).casefold()
+    return " ".join(re.sub(r"[^\w]+", " ", text).split())
+
+
+def trigrams(key: str) -> set[str]:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _word_suffixes(key: str) -> list[str]:
+    words = key.split(" ")
+    return [" ".join(words[i:]) for i in range(len(words))]
+
+
+def row_from_jikan(kind: str, entry: dict, fetched_at: float | None = None) -> dict:
+    """Maps one Jikan `data` entry to a catalog row."""
+    synonyms = list(entry.get("title_synonyms") or [])
+    for alt in entry.get("titles") or []:
+        text = alt.get("title")
+        if text and text not in synonyms and text not in (entry.get("title"), entry.get("title_english"),
+                                                          entry.get("title_japanese")):
+            synonyms.append(text)
+    return {
+        "kind": kind,
+        "mal_id": int(entry["mal_id"]),
+        "title": entry.get("title") or "",
+        "title_english": entry.get("title_english"),
+        "title_japanese": entry.get("title_japanese"),
+        "synonyms": synonyms,
+        "score": entry.get("score"),
+        "members": entry.get("members") or 0,
+        "fetched_at": fetched_at or time.time(),
+    }
+
+
+class Match:
+    __slots__ = ("kind", "mal_id", "title", "confidence", "matched")
+
+    def __init__(self, kind: str, mal_id: int, title: str, confidence: float, matched: str) -> None:
+        self.kind = kind
+        self.mal_id = mal_id
+        self.title = title
+        self.confidence = confidence
+        self.matched = matched
+
+    def to_dict(self) -> dict:
+        return {"kind": self.kind, "mal_id": self.mal_id, "title": self.title,
+                "confidence": self.confidence, "matched": self.matched}
+
+
+class Catalog:
+    """Columnar catalog plus an in-memory title index; `resolve` is safe to call from any thread."""
+
+    def __init__(self, table: pa.Table | None = None) -> None:
+        self._lock = threading.RLock()
+        self.table = SCHEMA.empty_table()
+        # Row state indexed by (kind, mal_id): (title, members, keys it is indexed under).
+        self._entries: dict[tuple, tuple[str, int, tuple]] = {}
+        self._exact: dict[str, set[tuple]] = defaultdict(set)
+        self._compact: dict[str, set[tuple]] = defaultdict(set)
+        # Sorted (title or title from its n-th word on, title) pairs for prefix search.
+        self._prefixes: list[tuple[str, str]] = []
+        self._grams: dict[str, set[str]] = defaultdict(set)
+        self._gram_counts: dict[str, int] = {}
+        if table is not None:
+            self.upsert(table.to_pylist())
+
+    @classmethod
+    def load(cls, path: str) -> "Catalog":
+        return cls(feather.read_table(path, memory_map=True))
+
+    @classmethod
+    def from_snapshot(cls, path: str) -> "Catalog":
+        """Builds a catalog from a JSON snapshot: {"anime": [jikan entries], "manga": [...]}."""
+        with open(path, encoding="utf-8") as fh:
+            snapshot = json.load(fh)
+        return cls(pa.Table.from_pylist(
+            [row_from_jikan(kind, entry) for kind in KINDS for entry in snapshot.get(kind, [])], schema=SCHEMA))
+
+    def save(self, path: str) -> None:
+        with self._lock:
+            feather.write_feather(self.table, path)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def upsert(self, rows: list[dict]) -> int:
+        """Adds or replaces rows by (kind, mal_id), re-indexing only those rows; returns rows changed."""
+        if not rows:
+            return 0
+        with self._lock:
+            incoming = {(row["kind"], row["mal_id"]): row for row in rows}
+            replaced = pa.array([False] * self.table.num_rows, pa.bool_())
+            for kind in KINDS:
+                ids = [mal_id for row_kind, mal_id in incoming if row_kind == kind]
+                if ids:
+                    replaced = pc.or_(replaced, pc.and_(pc.equal(self.table["kind"], kind),
+                                                        pc.is_in(self.table["mal_id"], pa.array(ids, pa.int64()))))
+            self.table = pa.concat_tables([
+                self.table.filter(pc.invert(replaced)),
+                pa.Table.from_pylist(list(incoming.values()), schema=SCHEMA),
+            ]).combine_chunks()
+            for ref in incoming:
+                self._unindex(ref)
+            for ref, row in incoming.items():
+                self._index(ref, row)
+            # New prefixes were appended; timsort merges that run in about linear time.
+            self._prefixes.sort()
+            return len(incoming)
+
+    def _index(self, ref: tuple, row: dict) -> None:
+        names = [row.get(column) for column in TITLE_COLUMNS] + list(row.get("synonyms") or [])
+        keys = tuple({normalize_title(name) for name in names if name} - {""})
+        self._entries[ref] = (row["title"], row.get("members") or 0, keys)
+        for key in keys:
+            if not self._exact[key]:
+                self._prefixes.extend((prefix, key) for prefix in _word_suffixes(key))
+                grams = trigrams(key)
+                self._gram_counts[key] = len(grams)
+                for gram in grams:
+                    self._grams[gram].add(key)
+            self._exact[key].add(ref)
+            self._compact[key.replace(" ", "")].add(ref)
+
+    def _unindex(self, ref: tuple) -> None:
+        entry = self._entries.pop(ref, None)
+        if entry is None:
+            return
+        for key in entry[2]:
+            self._exact[key].discard(ref)
+            self._compact[key.replace(" ", "")].discard(ref)
+            if not self._exact[key]:
+                del self._exact[key]
+                for prefix in _word_suffixes(key):
+                    del self._prefixes[bisect.bisect_left(self._prefixes, (prefix, key))]
+                del self._gram_counts[key]
+                for gram in trigrams(key):
+                    self._grams[gram].discard(key)
+
+    def resolve(self, query: str, kind: str | None = None, limit: int = 5) -> list[Match]:
+        """Best catalog matches for a title, most confident (then most popular) first.
+
+        Stops at the first of these that matches: exact title, exact ignoring
+        spaces, prefix of a title or of one of its words, trigram similarity
+        (typos and reordered words).
+        """
+        key = normalize_title(query)
+        if not key:
+            return []
+        with self._lock:
+            found: dict[tuple, tuple[float, str]] = {}
+
+            def add(refs, confidence: float, matched: str) -> None:
+                for ref in refs:
+                    if (kind is None or ref[0] == kind) and confidence > found.get(ref, (0.0,))[0]:
+                        found[ref] = (confidence, matched)
+
+            add(self._exact.get(key, ()), 1.0, key)
+            add(self._compact.get(key.replace(" ", ""), ()), 0.97, key)
+            if not found:
+                start = bisect.bisect_left(self._prefixes, (key,))
+                for prefix, candidate in self._prefixes[start:start + PREFIX_SCAN]:
+                    if not prefix.startswith(key):
+                        break
+                    # A match at the start of the title beats one at a later word.
+                    base = 0.8 if prefix == candidate else 0.7
+                    add(self._exact[candidate], round(base + 0.15 * len(key) / len(prefix), 3), candidate)
+            if not found:
+                for candidate, similarity in self._similar(key):
+                    add(self._exact[candidate], round(0.75 * similarity, 3), candidate)
+
+            ranked = sorted(found.items(), key=lambda item: (-item[1][0], -self._entries[item[0]][1]))
+            return [Match(ref[0], ref[1], self._entries[ref][0], confidence, matched)
+                    for ref, (confidence, matched) in ranked[:limit]]
+
+    def _similar(self, key: str, threshold: float = 0.45, limit: int = 20) -> list[tuple[str, float]]:
+        grams = trigrams(key)
+        # A title reaching `threshold` shares at least `needed` grams with the query, so it
+        # holds one of the query's rarest len(grams) - needed + 1 grams; only those seed candidates.
+        needed = math.ceil(threshold * (len(grams) + 1) / 2)
+        postings = sorted((self._grams.get(gram, set()) for gram in grams), key=len)
+        candidates = set().union(*postings[:len(grams) - needed + 1])
+        counts: dict[str, int] = dict.fromkeys(candidates, 0)
+        for posting in postings:
+            for candidate in posting & candidates if len(posting) > len(candidates) else posting:
+                if candidate in counts:
+                    counts[candidate] += 1
+        scored = []
+        for candidate, shared in counts.items():
+            dice = 2 * shared / (len(grams) + self._gram_counts[candidate])
+            if dice >= threshold:
+                scored.append((candidate, dice))
+        scored.sort(key=lambda item: -item[1])
+        return scored[:limit]
+
+    def refresh(self, pages: int | None = None, order_by: str = "start_date") -> int:
+        """Upserts the newest listing pages of each kind, so titles added since the last ingest resolve."""
+        pages = Config.CATALOG_REFRESH_PAGES if pages is None else pages
+        return sum(self.upsert(fetch_pages(kind, pages, order_by=order_by)) for kind in KINDS)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = {kind: 0 for kind in KINDS}
+            for kind, _ in self._entries:
+                counts[kind] += 1
+            return {**counts, "titles": len(self._exact), "bytes": self.table.nbytes}
+
+
+def fetch_pages(kind: str, pages: int, start_page: int = 1, base_url: str | None = None,
+                order_by: str = "members", client: httpx.Client | None = None) -> list[dict]:
+    """Reads Jikan listing pages (25 entries each), staying under its rate limit."""
+    base_url = (base_url or Config.CATALOG_JIKAN_URL).rstrip("/")
+    bucket = TokenBucket(Config.PROXY_UPSTREAM_RATE, Config.PROXY_UPSTREAM_BURST)
+    client = client or httpx.Client(timeout=Config.PROXY_UPSTREAM_TIMEOUT, follow_redirects=True)
+    rows = []
+    for page in range(start_page, start_page + pages):
+        bucket.acquire(Config.PROXY_RATE_WAIT)
+        resp = client.get(f"{base_url}/v4/{kind}", params={"order_by": order_by, "sort": "desc", "page": page})
+        resp.raise_for_status()
+        body = resp.json()
+        fetched_at = time.time()
+        rows += [row_from_jikan(kind, entry, fetched_at) for entry in body.get("data", [])]
+        if not body.get("pagination", {}).get("has_next_page"):
+            break
+    return rows
+
+
+_catalog: Catalog | None = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> Catalog:
+    """Returns the process-wide catalog, loaded from CATALOG_PATH (empty if the file is missing)."""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                try:
+                    _catalog = Catalog.load(Config.CATALOG_PATH)
+                except (OSError, pa.ArrowInvalid):
+                    _catalog = Catalog()
+    return _catalog
+
+
+def start_refresher(interval: float, path: str | None = None) -> threading.Thread:
+    """Refreshes the process-wide catalog every `interval` seconds and saves it to CATALOG_PATH."""
+    def loop() -> None:
+        while True:
+            time.sleep(interval)
+            catalog = get_catalog()
+            try:
+                changed = catalog.refresh()
+                catalog.save(path or Config.CATALOG_PATH)
+                logger.info("Catalog refresh upserted %d titles (%s)", changed, catalog.stats())
+            except (httpx.HTTPError, OSError) as exc:
+                logger.warning("Catalog refresh failed: %s", exc)
+
+    thread = threading.Thread(target=loop, name="catalog-refresh", daemon=True)
+    thread.start()
+    return thread
+
+
+def handle_resolve(query: str) -> tuple[int, str, bytes, str]:
+    """Proxy route `/catalog/resolve?q=<title>[&kind=anime|manga][&limit=n]`, in the proxy's response shape."""
+    params = parse_qs(query)
+    title = params.get("q", [""])[0]
+    kind = params.get("kind", [None])[0]
+    if not title or kind not in (None, *KINDS):
+        return 400, "application/json", b'{"error": "expected q and optional kind=anime|manga"}', "BYPASS"
+    try:
+        limit = min(int(params.get("limit", ["5"])[0]), 25)
+    except ValueError:
+        limit = 5
+    matches = get_catalog().resolve(title, kind, limit)
+    body = json.dumps({"data": [match.to_dict() for match in matches]}, ensure_ascii=False).encode()
+    return 200, "application/json", body, "LOCAL"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build and query the local anime/manga catalog")
+    parser.add_argument("--path", default=Config.CATALOG_PATH, help="Arrow IPC file to read and write")
+    commands = parser.add_subparsers(dest="command", required=True)
+    imported = commands.add_parser("import", help="merge a JSON snapshot of Jikan entries")
+    imported.add_argument("snapshot")
+    ingest = commands.add_parser("ingest", help="merge listing pages fetched from Jikan (or the caching proxy)")
+    ingest.add_argument("--kind", choices=KINDS, default="anime")
+    ingest.add_argument("--pages", type=int, default=Config.CATALOG_REFRESH_PAGES)
+    ingest.add_argument("--start-page", type=int, default=1)
+    ingest.add_argument("--order-by", default="members", help="e.g. members for popular, start_date for new")
+    ingest.add_argument("--base-url", default=Config.CATALOG_JIKAN_URL)
+    resolve = commands.add_parser("resolve", help="look up a title")
+    resolve.add_argument("query")
+    resolve.add_argument("--kind", choices=KINDS)
+    args = parser.parse_args()
+
+    try:
+        catalog = Catalog.load(args.path)
+    except (OSError, pa.ArrowInvalid):
+        catalog = Catalog()
+    if args.command == "resolve":
+        print(json.dumps([match.to_dict() for match in catalog.resolve(args.query, args.kind)],
+                         ensure_ascii=False, indent=2))
+        return
+    if args.command == "import":
+        changed = catalog.upsert(Catalog.from_snapshot(args.snapshot).table.to_pylist())
+    else:
+        changed = catalog.upsert(fetch_pages(args.kind, args.pages, args.start_page, args.base_url, args.order_by))
+    catalog.save(args.path)
+    print(json.dumps({"upserted": changed, **catalog.stats()}))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
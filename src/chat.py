@@ -1,123 +1,594 @@
-import requests
+import asyncio
+import httpx
+import json
+import logging
+import secrets
+import time
 from datetime import datetime
 from .config import Config
-from .database import Database
+from .answer_cache import answer_cache
+from .cache import TTLLRUCache
+from .health import read_with_retries, status as health_status
+from .jobs import Job, JobQueue
+from .messages import MessageStore
+from .metrics import log_payload
+from .router import route_hint
+from .sessions import SessionIndex, SessionPage
+from .transport import get_transport
+from .wire import ACCEPT, HISTORY_FIELDS, SESSION_FIELDS, decode, history_rows, session_dicts
 
 
-class ChatManager:
-    def __init__(self) -> None:
-        self.db = Database()
+logger = logging.getLogger(__name__)
+
+
+# Shared by every Streamlit session in the process; keys start with the username.
+_session_index = SessionIndex(Config.CHAT_CACHE_SIZE, Config.SESSIONS_CACHE_TTL)
+_history_cache = TTLLRUCache(Config.CHAT_CACHE_SIZE, Config.HISTORY_CACHE_TTL)
+_background_tasks: set = set()
+
+
+def _base36(num: int) -> str:
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    out = ""
+    while num:
+        num, rem = divmod(num, 36)
+        out = digits[rem] + out
+    return out or "0"
+
+
+def new_session_id(username: str | None = None) -> str:
+    """Mirrors the sessionId format generated by the n8n `Code` node."""
+    stamp = _base36(int(time.time() * 1000))
+    suffix = _base36(secrets.randbelow(36 ** 5)).rjust(5, "0")
+    if username:
+        return f"web_{username.lower().strip()}_{stamp}_{suffix}"
+    return f"web_anon_{stamp}_{suffix}"
+
+
+def _answered(data: dict) -> bool:
+    """True for a reply that holds an agent answer rather than a placeholder or error text."""
+    response = data.get("response")
+    if not response or data.get("error") or response == "Processing completed":
+        return False
+    return not response.startswith(("Request failed:", "Request timeout", "Connection error:"))
+
+
+class HistoryPage:
+    """A contiguous run of a session's messages: `messages` covers indexes [start, start + len)."""
+
+    def __init__(self, start: int, total: int, messages: list) -> None:
+        self.start = start
+        self.total = total
+        self.messages = messages
+
+    @property
+    def end(self) -> int:
+        return self.start + len(self.messages)
 
-    def send_message(self, message: str, session_id: str | None, user=None) -> str:
+    @property
+    def has_older(self) -> bool:
+        return self.start > 0
+
+    def slice(self, begin: int, end: int) -> "HistoryPage":
+        begin = max(begin, self.start)
+        end = max(begin, min(end, self.end))
+        return HistoryPage(begin, self.total, self.messages[begin - self.start:end - self.start])
+
+    def extend(self, messages: list) -> "HistoryPage":
+        return HistoryPage(self.start, self.total + len(messages), self.messages + messages)
+
+
+def _merge_pages(cached: HistoryPage | None, page: HistoryPage) -> HistoryPage | None:
+    """Combines a freshly fetched page with the cached tail window of the same session."""
+    if cached is None or page.start > cached.end or page.end < cached.start:
+        # Only a page that reaches the newest message can stand in for the cached tail.
+        return page if page.end == page.total else cached
+    head = cached.messages[:max(0, page.start - cached.start)]
+    if page.end >= cached.end:
+        return HistoryPage(min(cached.start, page.start), page.total, head + page.messages)
+    tail = cached.messages[page.end - cached.start:]
+    return HistoryPage(min(cached.start, page.start), cached.total, head + page.messages + tail)
+
+
+class MessageStream:
+    """Iterates text chunks of a streamed agent reply.
+
+    Understands SSE (`data:` lines), n8n's newline-delimited `begin`/`item`/`end`
+    chunks, and falls back to the plain JSON body of a `Respond to Webhook` node.
+    Supports both `for` (from a Streamlit script thread) and `async for`.
+    After iteration, `data` holds the same dict `send_message` would have returned.
+    """
+
+    STREAM_CHUNK_TYPES = ("begin", "item", "end", "error")
+
+    def __init__(self, transport, payload: dict, headers: dict, on_complete=None, cached: str | None = None) -> None:
+        self.transport = transport
+        self.payload = payload
+        self.headers = headers
+        self.on_complete = on_complete
+        self.cached = cached
+        self._ok = False
+        self._started = 0.0
+        self.data: dict = {"sessionId": payload.get("session_id")}
+        self._parts: list[str] = []
+
+    def __iter__(self):
+        if self.cached is not None:
+            return iter(self._replay())
+        return self.transport.iterate(self.__aiter__())
+
+    def _replay(self):
+        self.data.update(response=self.cached, cached=True)
+        yield self.cached
+
+    async def __aiter__(self):
+        if self.cached is not None:
+            for text in self._replay():
+                yield text
+            return
+        fallback = None
+        self._started = time.perf_counter()
+        try:
+            async with self.transport.astream("chat", "POST", Config.N8N_WEBHOOK_URL, json=self.payload, headers=self.headers) as resp:
+                logger.debug("stream_message status %s", resp.status_code)
+                if resp.status_code != 200:
+                    fallback = f"Request failed: {resp.status_code}"
+                else:
+                    self._ok = True
+                    content_type = resp.headers.get("content-type", "")
+                    chunks = self._sse_chunks(resp) if "text/event-stream" in content_type else self._line_chunks(resp)
+                    async for chunk in chunks:
+                        text = self._handle_chunk(chunk)
+                        if text:
+                            yield text
+        except httpx.TimeoutException:
+            logger.warning("stream_message timed out")
+            fallback = "Request timeout, please try again"
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("stream_message connection error: %s", exc)
+            fallback = f"Connection error: {exc}"
+        text = self._finish(fallback)
+        if text:
+            yield text
+
+    async def _sse_chunks(self, resp: httpx.Response):
+        async for line in resp.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            try:
+                yield json.loads(data)
+            except ValueError:
+                yield data
+
+    async def _line_chunks(self, resp: httpx.Response):
+        buffered: list[str] = []
+        streaming = False
+        async for line in resp.aiter_lines():
+            if not line.strip():
+                continue
+            try:
+                chunk = json.loads(line)
+            except ValueError:
+                chunk = None
+            if not streaming:
+                if isinstance(chunk, dict) and chunk.get("type") in self.STREAM_CHUNK_TYPES:
+                    streaming = True
+                else:
+                    buffered.append(line)
+                    continue
+            if chunk is not None:
+                yield chunk
+
+        if buffered:
+            # Plain `Respond to Webhook` reply: the whole body is one JSON document.
+            try:
+                data = json.loads("\n".join(buffered))
+            except ValueError:
+                data = None
+            if isinstance(data, list) and data and isinstance(data[0], dict):
+                data = data[0]
+            if isinstance(data, dict):
+                yield data
+
+    def _handle_chunk(self, chunk) -> str:
+        if isinstance(chunk, str):
+            text = chunk
+        elif isinstance(chunk, dict):
+            if chunk.get("sessionId"):
+                self.data["sessionId"] = chunk["sessionId"]
+            if chunk.get("type") == "error":
+                self.data["error"] = True
+                text = f"Request failed: {chunk.get('content', 'stream error')}"
+            elif chunk.get("type") in ("begin", "end"):
+                text = ""
+            else:
+                text = chunk.get("content") or chunk.get("response") or chunk.get("delta") or ""
+        else:
+            text = ""
+        if text:
+            self._parts.append(text)
+        return text
+
+    def _finish(self, fallback: str | None = None) -> str | None:
+        """Settles `data`; returns the fallback text when nothing was streamed."""
+        emitted = None
+        if not self._parts and fallback:
+            self._parts.append(fallback)
+            emitted = fallback
+        self.data["response"] = "".join(self._parts) or "Processing completed"
+        if self._ok and self.on_complete:
+            self.on_complete(self.payload, self.data, time.perf_counter() - self._started)
+        return emitted
+
+
+class AsyncChatManager:
+    """asyncio implementation of the n8n chat API on the shared `httpx.AsyncClient`.
+
+    Coroutines must run on the transport loop (`transport.run`/`transport.spawn`),
+    which owns the pooled client.
+    """
+
+    @property
+    def transport(self):
+        # Resolved on first request so importing the app builds no HTTP client.
+        return get_transport()
+
+    def _headers(self) -> dict:
+        headers = {}
+        if Config.N8N_API_KEY:
+            headers["X-API-Key"] = Config.N8N_API_KEY
+        return headers
+
+    def _build_payload(self, message: str, session_id: str | None, user=None,
+                       prior_turns: int | None = None) -> dict:
         payload = {
             "message": message,
             "session_id": session_id,
             "source": "streamlit",
             "timestamp": datetime.now().isoformat(),
         }
-        print(f"[send_message] payload: {payload}")
         if user:
             payload["user_id"] = getattr(user, "id", None)
             payload["username"] = getattr(user, "email", None)
+        # Lets the workflow send obvious prompts straight to a sub-agent, skipping the Supervisor.
+        # Unknown history length: assume an existing session has earlier turns.
+        payload.update(route_hint(message, prior_turns if prior_turns is not None else int(bool(session_id))))
+        return payload
 
-        headers = {}
-        if Config.N8N_API_KEY:
-            headers["X-API-Key"] = Config.N8N_API_KEY
+    def _cached_answer(self, message: str, session_id: str | None, prior_turns: int | None) -> tuple:
+        """Looks up the opt-in answer cache; returns (answer, store key), both None when not applicable."""
+        if not Config.ANSWER_CACHE_ENABLED:
+            return None, None
+        if prior_turns is None:
+            prior_turns = 1 if session_id else 0
+        return answer_cache.lookup(message, prior_turns)
+
+    async def send_message(self, message: str, session_id: str | None, user=None,
+                           prior_turns: int | None = None) -> dict:
+        """Sends one turn to the agent workflow and returns the whole reply.
 
+        `prior_turns` is the number of messages already in the session; only a
+        context-free first turn may be answered from the answer cache, in which
+        case the workflow just stores the turn instead of running the agents.
+        The chat webhook streams its reply, so this drains `stream_message`; a
+        plain JSON reply from a `Respond to Webhook` node reads the same way.
+        """
+        stream = self.stream_message(message, session_id, user, prior_turns)
+        async for _ in stream:
+            pass
+        return stream.data
+
+    def stream_message(self, message: str, session_id: str | None, user=None,
+                       prior_turns: int | None = None) -> "MessageStream":
+        """Sends one turn; iterate the result for text chunks as they arrive, then read `.data`."""
+        answer, answer_key = self._cached_answer(message, session_id, prior_turns)
+        if answer is not None:
+            logger.info("stream_message answer cache hit: %s", answer_key)
+            payload = self._store_cached_turn(message, session_id, user, answer)
+            return MessageStream(self.transport, payload, {}, cached=answer)
+
+        created = not session_id
+        if created:
+            # Streamed replies may not echo the sessionId back, so pick it here using
+            # the same format the workflow's Code node would have generated.
+            session_id = new_session_id(getattr(user, "email", None) if user else None)
+        payload = self._build_payload(message, session_id, user, prior_turns)
+        payload["stream"] = True
+        log_payload(logger, "stream_message payload", payload)
+        headers = self._headers()
+        headers["Accept"] = "text/event-stream, application/x-ndjson, application/json"
+        return MessageStream(
+            self.transport, payload, headers,
+            on_complete=lambda sent, data, elapsed: self._on_reply(
+                sent, data, elapsed, created=created, answer_key=answer_key),
+        )
+
+    def _store_cached_turn(self, message: str, session_id: str | None, user, answer: str) -> dict:
+        """Has the workflow store a turn answered from the answer cache, in the background.
+
+        The `cached_answer` payload skips the agents but is saved like any other turn,
+        so the session exists in n8n and a follow-up keeps its context.
+        """
+        if not session_id:
+            session_id = new_session_id(getattr(user, "email", None) if user else None)
+        payload = self._build_payload(message, session_id, user, 0)
+        payload["cached_answer"] = answer
+        log_payload(logger, "cached turn payload", payload)
+        self.transport.spawn(self._post_cached_turn(payload))
+        return payload
+
+    async def _post_cached_turn(self, payload: dict) -> None:
         try:
-            print(f"[send_message] POST {Config.N8N_WEBHOOK_URL} headers: {headers}")
-            resp = requests.post(Config.N8N_WEBHOOK_URL, json=payload, headers=headers, timeout=90)
-            print(f"[send_message] Response status: {resp.status_code}")
-            if resp.status_code == 200:
-                data = resp.json()
-                print(f"[send_message] Response JSON: {data}")
-                if isinstance(data, dict):
-                    return data
-                return {"response": "Processing completed"}
-            print(f"[send_message] Request failed: {resp.status_code}")
-            return {"response": f"Request failed: {resp.status_code}"}
+            resp = await self.transport.arequest("chat", "POST", Config.N8N_WEBHOOK_URL, json=payload, headers=self._headers())
+        except httpx.HTTPError as exc:
+            logger.warning("Could not store cached turn for %s: %s", payload["session_id"], exc)
+            return
+        if resp.status_code != 200:
+            logger.warning("Could not store cached turn for %s: HTTP %s", payload["session_id"], resp.status_code)
+            return
+        self._on_reply(payload, {"sessionId": payload["session_id"], "response": payload["cached_answer"]}, 0.0, created=True)
 
-        except requests.exceptions.Timeout:
-            print("[send_message] Request timeout")
-            return {"response": "Request timeout, please try again"}
-        except Exception as exc:  # noqa: BLE001
-            print(f"[send_message] Connection error: {exc}")
-            return {"response": f"Connection error: {exc}"}
+    def _on_reply(self, payload: dict, data: dict, elapsed: float, created: bool = False,
+                  answer_key: tuple | None = None) -> None:
+        """Keeps the shared caches in step with a turn the workflow has just stored."""
+        if answer_key and _answered(data):
+            answer_cache.store(answer_key, answer_cache.ttl_for(answer_key), data["response"], elapsed)
+        new_session = data.get("sessionId")
+        if not new_session:
+            return
+        username = payload.get("username")
+        if username:
+            _session_index.record_turn(username, new_session, payload["message"])
+        if not created and new_session == payload.get("session_id"):
+            turn = [["human", payload["message"]], ["ai", data.get("response", "")]]
+            _history_cache.update((username, new_session), lambda page: page.extend(turn))
 
-    def get_history(self, username: str | None = None, session_id: str | None = None) -> list:
+    def _cache_page(self, key: tuple, cached: "HistoryPage | None", page: "HistoryPage") -> None:
+        merged = _merge_pages(cached, page)
+        if merged is not None:
+            _history_cache.set(key, merged)
+
+    def cache_stats(self) -> dict:
+        return {
+            "sessions": _session_index.stats(),
+            "history": _history_cache.stats(),
+            "answers": answer_cache.stats(),
+        }
+
+    async def get_history(self, username: str | None = None, session_id: str | None = None) -> list:
+        """Returns all of a session's messages as n8n-style dicts, served from the shared cache when fresh."""
+        key = (username, session_id)
+        cached = _history_cache.get(key)
+        if cached is not None and cached.start == 0:
+            return [message.to_dict() for message in MessageStore.from_page(cached, limit=len(cached.messages))]
+        page = await self._fetch_history(username, session_id)
+        if page is None:
+            return []
+        self._cache_page(key, cached, page)
+        return [message.to_dict() for message in MessageStore.from_page(page, limit=len(page.messages))]
+
+    async def get_history_page(self, username: str | None, session_id: str | None,
+                               limit: int | None = None, before: int | None = None) -> "HistoryPage":
+        """Returns up to `limit` messages ending just before index `before` (default: the newest).
+
+        Pass the returned page's `start` as `before` to load the next older page.
+        """
+        limit = limit or Config.HISTORY_PAGE_SIZE
+        key = (username, session_id)
+        cached = _history_cache.get(key)
+        if cached is not None:
+            end = cached.total if before is None else before
+            if cached.start <= max(0, end - limit):
+                return cached.slice(end - limit, end)
+        page = await self._fetch_history(username, session_id, limit=limit, before=before)
+        if page is None:
+            return HistoryPage(0, 0, [])
+        self._cache_page(key, cached, page)
+        end = page.total if before is None else before
+        return page.slice(end - limit, end)
+
+    async def get_history_since(self, username: str | None, session_id: str | None, index: int) -> "HistoryPage":
+        """Fetches only the messages stored after the first `index` messages of a session."""
+        key = (username, session_id)
+        page = await self._fetch_history(username, session_id, since=index)
+        if page is None:
+            return HistoryPage(index, index, [])
+        cached = _history_cache.get(key)
+        self._cache_page(key, cached, page)
+        return page.slice(index, page.total)
+
+    async def _fetch_history(self, username: str | None, session_id: str | None, limit: int | None = None,
+                             before: int | None = None, since: int | None = None) -> "HistoryPage | None":
         payload: dict = {"source": "streamlit"}
         if username:
             payload["username"] = username
         if session_id:
             payload["session_id"] = session_id
+        if limit is not None:
+            payload["limit"] = limit
+        if before is not None:
+            payload["before"] = before
+        if since is not None:
+            payload["since"] = since
+        payload["fields"] = list(HISTORY_FIELDS)
 
-        print(f"[get_history] payload: {payload}")
-        headers = {}
-        if Config.N8N_API_KEY:
-            headers["X-API-Key"] = Config.N8N_API_KEY
+        log_payload(logger, "get_history payload", payload)
+        headers = self._headers()
+        headers["Accept"] = ACCEPT
 
         if not Config.N8N_GET_HISTORY_URL:
-            print("[get_history] N8N_GET_HISTORY_URL not configured")
-            return []
+            logger.warning("N8N_GET_HISTORY_URL not configured")
+            return None
 
-        print(f"[get_history] POST {Config.N8N_GET_HISTORY_URL} headers: {headers}")
         try:
-            resp = requests.post(Config.N8N_GET_HISTORY_URL, json=payload, headers=headers, timeout=30)
-            print(f"[get_history] Response status: {resp.status_code}")
+            resp = await read_with_retries(lambda: self.transport.arequest(
+                "history", "POST", Config.N8N_GET_HISTORY_URL, json=payload, headers=headers), "history")
+            logger.debug("get_history status %s", resp.status_code)
             if resp.status_code == 200:
-                data = resp.json()
-                print(f"[get_history] Response JSON: {data}")
+                data = decode(resp, "history")
+                log_payload(logger, "get_history response", data)
                 if isinstance(data, list) and data and "messages" in data[0]:
-                    messages = data[0].get("messages", [])
-                    return messages
-                elif isinstance(data, dict) and "messages" in data:
-                    messages = data.get("messages", [])
-                    return messages
+                    data = data[0]
+                if isinstance(data, dict) and "messages" in data:
+                    messages = history_rows(data)
+                    if "total" in data:
+                        return HistoryPage(data.get("start", 0), data["total"], messages)
+                    # Older workflows ignore paging and return the whole session.
+                    return HistoryPage(0, len(messages), messages)
                 else:
-                    print("[get_history] Unexpected data format")
-                    return []
+                    logger.warning("get_history returned an unexpected data format")
+                    return None
             else:
-                print(f"[get_history] HTTP error: {resp.status_code}")
-                return []
-        except requests.exceptions.RequestException as e:
-            print(f"[get_history] RequestException: {e}")
-            return []
+                logger.warning("get_history failed with HTTP %s", resp.status_code)
+                return None
+        except httpx.HTTPError as e:
+            logger.warning("get_history HTTP error: %s", e)
+            return None
         except Exception as e:
-            print(f"[get_history] Exception: {e}")
-            return []
+            logger.exception("get_history failed: %s", e)
+            return None
 
-    def get_session_list(self, username: str) -> list:
-        """Fetches the list of chat sessions for a user."""
-        if not Config.N8N_GET_SESSIONS_URL:
-            print("[get_session_list] N8N_GET_SESSIONS_URL not configured")
-            return []
-        url = f"{Config.N8N_GET_SESSIONS_URL}?username={username}"
-        print(f"[get_session_list] url: {url}")
-        headers = {}
-        if Config.N8N_API_KEY:
-            headers["X-API-Key"] = Config.N8N_API_KEY
+    async def get_session_list(self, username: str) -> list:
+        """Returns all of a user's sessions as dicts, most recently updated first."""
+        page = await self.get_session_page(username)
+        return [summary.to_dict() for summary in page.items]
+
+    async def get_session_page(self, username: str, offset: int = 0, limit: int | None = None) -> SessionPage:
+        """Returns one page of the user's session summaries, most recently updated first.
 
-        print(f"[get_session_list] headers: {headers}")
+        Served from the shared session index, which replies keep current; the
+        workflow's listing is only re-read once the index is older than SESSIONS_CACHE_TTL.
+        """
+        if not _session_index.is_fresh(username):
+            sessions = await self._fetch_session_list(username)
+            if sessions is not None:
+                _session_index.sync(username, sessions)
+        return _session_index.page(username, offset, limit)
+
+    async def _fetch_session_list(self, username: str) -> list | None:
+        if not Config.N8N_GET_SESSIONS_URL:
+            logger.warning("N8N_GET_SESSIONS_URL not configured")
+            return None
+        url = Config.N8N_GET_SESSIONS_URL
+        headers = self._headers()
+        headers["Accept"] = ACCEPT
+        params = {"username": username, "fields": ",".join(SESSION_FIELDS)}
         try:
-            resp = requests.get(url, headers=headers, timeout=30)
-            print(f"[get_session_list] Response status: {resp.status_code}")
+            resp = await read_with_retries(lambda: self.transport.arequest(
+                "sessions", "GET", url, params=params, headers=headers), "sessions")
+            logger.debug("get_session_list status %s", resp.status_code)
             if resp.status_code == 200:
-                data = resp.json()
-                print(f"[get_session_list] Response JSON: {data}")
+                data = decode(resp, "sessions")
+                log_payload(logger, "get_session_list response", data)
                 if isinstance(data, list) and len(data) > 0 and isinstance(data[0], dict) and 'sessions' in data[0]:
-                    sessions = data[0]['sessions']
-                    return sessions
+                    return session_dicts(data[0])
+                elif isinstance(data, dict) and 'sessions' in data:
+                    return session_dicts(data)
                 elif isinstance(data, list):
                     return data
                 else:
-                    print("[get_session_list] Unexpected data format")
-                    return []
+                    logger.warning("get_session_list returned an unexpected data format")
+                    return None
             else:
-                print(f"[get_session_list] HTTP error: {resp.status_code}")
-                return []
-        except requests.exceptions.RequestException as e:
-            print(f"[get_session_list] RequestException: {e}")
-            return []
+                logger.warning("get_session_list failed with HTTP %s", resp.status_code)
+                return None
+        except httpx.HTTPError as e:
+            logger.warning("get_session_list HTTP error: %s", e)
+            return None
         except Exception as e:
-            print(f"[get_session_list] Exception: {e}")
-            return []
+            logger.exception("get_session_list failed: %s", e)
+            return None
+
+    async def load_initial(self, username: str, prefetch: int | None = None) -> tuple[list, "HistoryPage | None"]:
+        """Loads the sidebar list and the newest session's first page for a fresh login.
+
+        When the user's latest session is already known in this process, both
+        requests run concurrently. The next `prefetch` sessions' pages are then
+        warmed in the background so sidebar clicks hit the cache.
+        """
+        guess = _session_index.latest(username)
+        if guess:
+            sessions, page = await asyncio.gather(
+                self.get_session_list(username),
+                self.get_history_page(username, guess),
+            )
+        else:
+            sessions, page = await self.get_session_list(username), None
+
+        latest = sessions[0].get("session_id") if sessions else None
+        if latest and latest != guess:
+            page = await self.get_history_page(username, latest)
+        elif not latest:
+            page = None
+
+        count = Config.HISTORY_PREFETCH_COUNT if prefetch is None else prefetch
+        others = [s.get("session_id") for s in sessions[1:count + 1] if s.get("session_id")]
+        if others:
+            task = asyncio.get_running_loop().create_task(self.prefetch_histories(username, others))
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+        return sessions, page
+
+    async def prefetch_histories(self, username: str, session_ids: list) -> None:
+        """Warms the shared history cache with the newest page of each session."""
+        await asyncio.gather(*(self.get_history_page(username, sid) for sid in session_ids))
+
+
+class ChatManager:
+    """Synchronous facade over `AsyncChatManager` for Streamlit script threads."""
+
+    def __init__(self) -> None:
+        self.aio = AsyncChatManager()
+        self.jobs = JobQueue(self.aio)
+
+    @property
+    def transport(self):
+        return self.aio.transport
+
+    def send_message(self, message: str, session_id: str | None, user=None,
+                     prior_turns: int | None = None) -> dict:
+        return self.transport.run(self.aio.send_message(message, session_id, user, prior_turns))
+
+    def stream_message(self, message: str, session_id: str | None, user=None,
+                       prior_turns: int | None = None) -> MessageStream:
+        return self.aio.stream_message(message, session_id, user, prior_turns)
+
+    def submit_message(self, message: str, session_id: str | None, user=None,
+                       prior_turns: int | None = None) -> Job:
+        """Queues a turn and returns at once; raises `QueueBusyError` when at capacity."""
+        return self.jobs.submit(message, session_id, user, prior_turns)
+
+    def get_job(self, job_id: str | None) -> Job | None:
+        return self.jobs.get(job_id)
+
+    def get_history(self, username: str | None = None, session_id: str | None = None) -> list:
+        return self.transport.run(self.aio.get_history(username, session_id))
+
+    def get_history_page(self, username: str | None, session_id: str | None,
+                         limit: int | None = None, before: int | None = None) -> HistoryPage:
+        return self.transport.run(self.aio.get_history_page(username, session_id, limit, before))
+
+    def get_history_since(self, username: str | None, session_id: str | None, index: int) -> HistoryPage:
+        return self.transport.run(self.aio.get_history_since(username, session_id, index))
+
+    def get_session_list(self, username: str) -> list:
+        return self.transport.run(self.aio.get_session_list(username))
+
+    def get_session_page(self, username: str, offset: int = 0, limit: int | None = None) -> SessionPage:
+        return self.transport.run(self.aio.get_session_page(username, offset, limit))
+
+    def load_initial(self, username: str, prefetch: int | None = None) -> tuple[list, HistoryPage | None]:
+        return self.transport.run(self.aio.load_initial(username, prefetch))
+
+    def cache_stats(self) -> dict:
+        return self.aio.cache_stats()
+
+    def job_stats(self) -> dict:
+        return self.jobs.stats()
+
+    def backend_status(self) -> dict:
+        """Circuit breaker state and keep-warm stats for the n8n backend."""
+        return health_status()
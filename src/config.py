@@ -10,8 +10,86 @@ class Config:
     N8N_GET_HISTORY_URL = os.getenv("N8N_GET_HISTORY_URL")
     N8N_GET_SESSIONS_URL = os.getenv("N8N_GET_SESSIONS_URL")  # For sidebar history
     N8N_API_KEY = os.getenv("N8N_API_KEY")
+    # Shared HTTP transport to n8n
+    N8N_HTTP2 = os.getenv("N8N_HTTP2", "false").lower() in ("1", "true", "yes")
+    # n8n's webhooks only answer JSON; msgpack is for backends that can produce it (bench/fake_n8n)
+    N8N_ACCEPT_MSGPACK = os.getenv("N8N_ACCEPT_MSGPACK", "false").lower() in ("1", "true", "yes")
+    N8N_POOL_SIZE = int(os.getenv("N8N_POOL_SIZE", "20"))
+    N8N_KEEPALIVE_EXPIRY = float(os.getenv("N8N_KEEPALIVE_EXPIRY", "60"))
+    N8N_CONNECT_TIMEOUT = float(os.getenv("N8N_CONNECT_TIMEOUT", "10"))
+    N8N_CHAT_TIMEOUT = float(os.getenv("N8N_CHAT_TIMEOUT", "90"))
+    N8N_HISTORY_TIMEOUT = float(os.getenv("N8N_HISTORY_TIMEOUT", "30"))
+    N8N_SESSIONS_TIMEOUT = float(os.getenv("N8N_SESSIONS_TIMEOUT", "30"))
+    # Backend health: circuit breaker, retried/hedged history and session reads, keep-warm pings
+    BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "3"))  # consecutive timeouts/gateway errors to open
+    BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", "5"))  # seconds before the first probe; doubles per failed probe
+    BREAKER_MAX_COOLDOWN = float(os.getenv("BREAKER_MAX_COOLDOWN", "60"))
+    N8N_READ_RETRIES = int(os.getenv("N8N_READ_RETRIES", "2"))
+    N8N_RETRY_BACKOFF = float(os.getenv("N8N_RETRY_BACKOFF", "0.5"))  # seconds, doubled per attempt with jitter
+    N8N_HEDGE_AFTER = float(os.getenv("N8N_HEDGE_AFTER", "5"))  # resend a read still unanswered after this; 0 disables
+    N8N_HEALTH_URL = os.getenv("N8N_HEALTH_URL")  # default: /healthz on the N8N_WEBHOOK_URL host
+    KEEPWARM_ENABLED = os.getenv("KEEPWARM_ENABLED", "true").lower() in ("1", "true", "yes")
+    KEEPWARM_MIN_INTERVAL = float(os.getenv("KEEPWARM_MIN_INTERVAL", "60"))
+    KEEPWARM_MAX_INTERVAL = float(os.getenv("KEEPWARM_MAX_INTERVAL", "780"))  # Render sleeps after 15 idle minutes
+    KEEPWARM_IDLE_AFTER = float(os.getenv("KEEPWARM_IDLE_AFTER", "3600"))  # stop pinging after this long without users; 0 never stops
+    KEEPWARM_TIMEOUT = float(os.getenv("KEEPWARM_TIMEOUT", "75"))  # a ping may have to wait out a cold start
+    HEALTH_STATUS_REFRESH = float(os.getenv("HEALTH_STATUS_REFRESH", "10"))  # sidebar status refresh while the breaker is open, seconds
+    # Process-wide cache of session lists and histories (0 disables)
+    CHAT_CACHE_SIZE = int(os.getenv("CHAT_CACHE_SIZE", "1024"))
+    SESSIONS_CACHE_TTL = float(os.getenv("SESSIONS_CACHE_TTL", "300"))
+    HISTORY_CACHE_TTL = float(os.getenv("HISTORY_CACHE_TTL", "600"))
+    # Sessions listed per "More chats" step in the sidebar
+    SESSION_PAGE_SIZE = int(os.getenv("SESSION_PAGE_SIZE", "20"))
+    # Messages fetched and rendered per "load older" step in the chat pane
+    HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "30"))
+    # Messages a browser session keeps in memory; older or newer ones are re-fetched on demand
+    MESSAGE_RESIDENT_LIMIT = int(os.getenv("MESSAGE_RESIDENT_LIMIT", "200"))
+    # Sessions below the newest whose first page is prefetched after login
+    HISTORY_PREFETCH_COUNT = int(os.getenv("HISTORY_PREFETCH_COUNT", "3"))
+    # Opt-in cache of answers to repeated, context-free first questions
+    ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+    ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "512"))
+    # Background agent turns: concurrent n8n runs, extra turns allowed to wait, turns per user
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "8"))
+    JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "32"))
+    JOB_PER_USER = int(os.getenv("JOB_PER_USER", "1"))
+    JOB_RESULT_TTL = float(os.getenv("JOB_RESULT_TTL", "600"))  # seconds a finished job stays pollable
+    JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "0.5"))
+    # Local pre-router: prompts at or above the confidence carry a route_hint for the workflow
+    ROUTER_ENABLED = os.getenv("ROUTER_ENABLED", "true").lower() in ("1", "true", "yes")
+    ROUTER_MIN_CONFIDENCE = float(os.getenv("ROUTER_MIN_CONFIDENCE", "0.8"))
     SUPABASE_URL = os.getenv("SUPABASE_URL")
     SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
+    AUTH_CONTEXT_IDLE_TTL = float(os.getenv("AUTH_CONTEXT_IDLE_TTL", "3600"))  # seconds before an idle login context is dropped
+    # Local access-token verification: HS256 projects set the JWT secret, others use the JWKS
+    SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+    SUPABASE_JWKS_TTL = float(os.getenv("SUPABASE_JWKS_TTL", "600"))
+    JWT_LEEWAY = float(os.getenv("JWT_LEEWAY", "10"))
+    AUTH_REFRESH_AHEAD = float(os.getenv("AUTH_REFRESH_AHEAD", "120"))  # refresh tokens this long before expiry
+    # Jikan/Animechan caching proxy (python -m src.proxy)
+    PROXY_HOST = os.getenv("PROXY_HOST", "0.0.0.0")
+    PROXY_PORT = int(os.getenv("PROXY_PORT", "8787"))
+    PROXY_JIKAN_UPSTREAM = os.getenv("PROXY_JIKAN_UPSTREAM", "https://api.jikan.moe")
+    PROXY_ANIMECHAN_UPSTREAM = os.getenv("PROXY_ANIMECHAN_UPSTREAM", "https://api.animechan.io")
+    PROXY_UPSTREAM_RATE = float(os.getenv("PROXY_UPSTREAM_RATE", "3"))  # requests/second per upstream
+    PROXY_UPSTREAM_BURST = int(os.getenv("PROXY_UPSTREAM_BURST", "3"))
+    PROXY_RATE_WAIT = float(os.getenv("PROXY_RATE_WAIT", "10"))  # max seconds to queue for a token
+    PROXY_UPSTREAM_TIMEOUT = float(os.getenv("PROXY_UPSTREAM_TIMEOUT", "20"))
+    PROXY_MAX_STALE = float(os.getenv("PROXY_MAX_STALE", "86400"))  # serve stale this long past TTL while revalidating
+    PROXY_REVALIDATE_BACKOFF = float(os.getenv("PROXY_REVALIDATE_BACKOFF", "30"))  # wait after a failed revalidation
+    PROXY_CACHE_SIZE = int(os.getenv("PROXY_CACHE_SIZE", "2048"))
+    # Local title catalog (python -m src.catalog), also served by the proxy at /catalog/resolve
+    CATALOG_PATH = os.getenv("CATALOG_PATH", "catalog.arrow")
+    CATALOG_JIKAN_URL = os.getenv("CATALOG_JIKAN_URL", PROXY_JIKAN_UPSTREAM)  # or the proxy's /jikan prefix
+    CATALOG_REFRESH_PAGES = int(os.getenv("CATALOG_REFRESH_PAGES", "4"))  # 25 titles per page
+    CATALOG_REFRESH_INTERVAL = float(os.getenv("CATALOG_REFRESH_INTERVAL", "0"))  # seconds; 0 disables
+    # Logging and timing metrics (METRICS_PORT=0 and no METRICS_FILE keep them in-process only)
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+    METRICS_FILE = os.getenv("METRICS_FILE")
+    METRICS_FILE_INTERVAL = float(os.getenv("METRICS_FILE_INTERVAL", "15"))
+    PAYLOAD_LOG_SAMPLE = float(os.getenv("PAYLOAD_LOG_SAMPLE", "0.1"))  # fraction of payloads logged at DEBUG
+    PAYLOAD_LOG_MAX_CHARS = int(os.getenv("PAYLOAD_LOG_MAX_CHARS", "2000"))
     APP_TITLE = os.getenv("APP_TITLE", "🗨️ Japan Anime-Manga Bot")
     APP_DESCRIPTION = os.getenv("APP_DESCRIPTION", "Multi-agent AI")
 
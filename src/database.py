@@ -1,7 +1,161 @@
+import heapq
+import logging
+import threading
+import time
 from supabase import create_client, Client
+from supabase_auth import SyncGoTrueClient
+from supabase_auth.http_clients import SyncClient
 from .config import Config
 
+
+logger = logging.getLogger(__name__)
+
+
+class ClientPool:
+    """Lazily built Supabase clients for the whole process.
+
+    One full client is shared for data access, while each Streamlit session gets
+    its own lightweight GoTrue auth context (sharing a single HTTP connection pool)
+    so logins never overwrite each other's session. Idle contexts are evicted, and
+    active ones get their tokens refreshed ahead of expiry by one background thread,
+    so no page load has to wait on a refresh.
+    """
+
+    ANON_CONTEXT = "__anon__"
+
+    def __init__(self, idle_ttl: float) -> None:
+        self.idle_ttl = idle_ttl
+        self._lock = threading.Lock()
+        self._client: Client | None = None
+        self._http: SyncClient | None = None
+        self._contexts: dict[str, tuple[SyncGoTrueClient, float]] = {}
+        self._refresh = threading.Condition()
+        self._refresh_heap: list[tuple[float, str]] = []
+        self._refresh_due: dict[str, float] = {}
+        self._refresher: threading.Thread | None = None
+
+    @property
+    def client(self) -> Client:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = create_client(Config.SUPABASE_URL, Config.SUPABASE_ANON_KEY)
+        return self._client
+
+    def auth(self, context_key: str | None = None) -> SyncGoTrueClient:
+        """Returns the auth context for a user session, creating it on first use."""
+        key = context_key or self.ANON_CONTEXT
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._contexts.get(key)
+            context = entry[0] if entry else self._new_context(key)
+            self._contexts[key] = (context, now)
+            return context
+
+    def release(self, context_key: str | None) -> None:
+        with self._lock:
+            entry = self._contexts.pop(context_key or self.ANON_CONTEXT, None)
+        self._cancel_refresh(context_key or self.ANON_CONTEXT)
+        if entry:
+            entry[0]._remove_session()
+
+    def _new_context(self, key: str) -> SyncGoTrueClient:
+        if self._http is None:
+            self._http = SyncClient(follow_redirects=True, http2=True)
+        context = SyncGoTrueClient(
+            url=f"{Config.SUPABASE_URL}/auth/v1",
+            headers={
+                "apiKey": Config.SUPABASE_ANON_KEY,
+                "Authorization": f"Bearer {Config.SUPABASE_ANON_KEY}",
+            },
+            auto_refresh_token=False,
+            http_client=self._http,
+        )
+        context.on_auth_state_change(lambda event, session: self._on_auth_event(key, event, session))
+        return context
+
+    def _evict_idle(self, now: float) -> None:
+        expired = [key for key, (_, used) in self._contexts.items() if now - used > self.idle_ttl]
+        for key in expired:
+            context, _ = self._contexts.pop(key)
+            self._cancel_refresh(key)
+            context._remove_session()
+
+    def _on_auth_event(self, key: str, event: str, session) -> None:
+        if event in ("SIGNED_IN", "TOKEN_REFRESHED") and session and session.expires_at:
+            self._schedule_refresh(key, session.expires_at - Config.AUTH_REFRESH_AHEAD)
+        elif event == "SIGNED_OUT":
+            self._cancel_refresh(key)
+
+    def _schedule_refresh(self, key: str, due: float) -> None:
+        with self._refresh:
+            self._refresh_due[key] = due
+            heapq.heappush(self._refresh_heap, (due, key))
+            if self._refresher is None:
+                self._refresher = threading.Thread(target=self._refresh_loop, name="auth-refresh", daemon=True)
+                self._refresher.start()
+            self._refresh.notify()
+
+    def _cancel_refresh(self, key: str) -> None:
+        with self._refresh:
+            self._refresh_due.pop(key, None)
+
+    def _refresh_loop(self) -> None:
+        while True:
+            with self._refresh:
+                while not self._refresh_heap or self._refresh_heap[0][0] > time.time():
+                    timeout = self._refresh_heap[0][0] - time.time() if self._refresh_heap else None
+                    self._refresh.wait(timeout)
+                due, key = heapq.heappop(self._refresh_heap)
+                if self._refresh_due.get(key) != due:
+                    continue  # rescheduled or cancelled since
+                del self._refresh_due[key]
+            with self._lock:
+                entry = self._contexts.get(key)
+            if entry is None or time.monotonic() - entry[1] > self.idle_ttl:
+                continue
+            try:
+                # Notifies TOKEN_REFRESHED, which schedules the next refresh.
+                entry[0].refresh_session()
+            except Exception as exc:
+                logger.warning("Background token refresh failed: %s", exc)
+
+    def stats(self) -> dict:
+        with self._lock:
+            contexts = len(self._contexts)
+        with self._refresh:
+            scheduled = len(self._refresh_due)
+        return {"auth_contexts": contexts, "scheduled_refreshes": scheduled, "data_client": self._client is not None}
+
+
+_pool: ClientPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ClientPool:
+    """Returns the process-wide client pool; nothing is constructed until first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ClientPool(Config.AUTH_CONTEXT_IDLE_TTL)
+    return _pool
+
+
 class Database:
-    def __init__(self) -> None:
-        self.client: Client = create_client(Config.SUPABASE_URL, Config.SUPABASE_ANON_KEY)
+    """Per-session view onto the shared pool; cheap to construct."""
+
+    def __init__(self, context_key: str | None = None) -> None:
+        self.context_key = context_key
+
+    @property
+    def client(self) -> Client:
+        return get_pool().client
+
+    @property
+    def auth(self) -> SyncGoTrueClient:
+        return get_pool().auth(self.context_key)
 
+    def release(self) -> None:
+        get_pool().release(self.context_key)
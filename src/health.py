@@ -0,0 +1,290 @@
+"""Backend health around the n8n transport: circuit breaker, read retries/hedging and keep-warm pings.
+
+n8n runs on a free Render instance that sleeps after 15 idle minutes and takes
+about a minute to wake. Once consecutive calls time out or get a gateway error,
+the breaker opens and every call fails at once with `CircuitOpenError` instead of
+waiting out its own timeout. After a cooldown, one request (usually the keep-warm
+ping) probes the backend while the others keep failing fast. The cooldown doubles
+each time a probe fails.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+import httpx
+from .config import Config
+from .metrics import registry
+
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+# Outcomes that mean the backend itself is unreachable; a 500 is a workflow error from a live n8n.
+BACKEND_DOWN = {"timeout", "connection_error", "http_502", "http_503", "http_504"}
+RETRY_STATUSES = {429, 502, 503, 504}
+
+registry.describe("n8n_breaker_transitions_total", "Circuit breaker state changes by new state.")
+registry.describe("n8n_retries_total", "History/session reads retried after a failed attempt.")
+registry.describe("n8n_hedged_total", "History/session reads that sent a hedge request, by which copy answered.")
+registry.describe("keepwarm_ping_seconds", "Keep-warm ping time by outcome (slow ones hit a cold start).")
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised instead of sending a request while the breaker is open."""
+
+
+class CircuitBreaker:
+    def __init__(self, failures: int, cooldown: float, max_cooldown: float) -> None:
+        self.threshold = max(failures, 1)
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.cooldown = cooldown
+        self.opened_at = 0.0
+        self.last_error: str | None = None
+        self.last_success = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """Admits a request; returns True if it is the half-open probe, raises CircuitOpenError if refused."""
+        with self._lock:
+            if self.state == CLOSED:
+                return False
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            raise CircuitOpenError(f"n8n backend unavailable ({self.last_error}); retrying in {self._retry_in():.0f}s")
+
+    def record(self, outcome: str, probe: bool) -> None:
+        with self._lock:
+            if probe:
+                self._probing = False
+            if outcome not in BACKEND_DOWN:
+                self.failures = 0
+                self.last_success = time.time()
+                if self.state != CLOSED:
+                    self.cooldown = self.base_cooldown
+                    self._transition(CLOSED)
+                return
+            self.failures += 1
+            self.last_error = outcome
+            if self.state == HALF_OPEN and probe:
+                self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+                self._open()
+            elif self.state == CLOSED and self.failures >= self.threshold:
+                self._open()
+
+    def abandon(self, probe: bool) -> None:
+        """Frees the probe slot of a request that was cancelled before it finished."""
+        if probe:
+            with self._lock:
+                self._probing = False
+
+    def _open(self) -> None:
+        self.opened_at = time.monotonic()
+        self._transition(OPEN)
+
+    def _transition(self, state: str) -> None:
+        if state != self.state:
+            logger.warning("n8n circuit breaker %s -> %s (%s)", self.state, state, self.last_error)
+            self.state = state
+            registry.inc("n8n_breaker_transitions_total", state=state)
+
+    def _retry_in(self) -> float:
+        return max(0.0, self.opened_at + self.cooldown - time.monotonic()) if self.state == OPEN else 0.0
+
+    def retry_in(self) -> float:
+        with self._lock:
+            return self._retry_in()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "retry_in": round(self._retry_in(), 1),
+                "last_error": self.last_error,
+                "last_success": self.last_success,
+            }
+
+
+breaker = CircuitBreaker(Config.BREAKER_FAILURES, Config.BREAKER_COOLDOWN, Config.BREAKER_MAX_COOLDOWN)
+
+
+def _retryable(result) -> bool:
+    if isinstance(result, CircuitOpenError):
+        return False
+    if isinstance(result, BaseException):
+        return isinstance(result, httpx.TransportError)
+    return result.status_code in RETRY_STATUSES
+
+
+async def _hedged(send, endpoint: str, hedge_after: float) -> httpx.Response:
+    """Sends once and, if no answer comes within `hedge_after` seconds, once more; the first good answer wins."""
+    first = asyncio.ensure_future(send())
+    if hedge_after <= 0:
+        return await first
+    done, _ = await asyncio.wait({first}, timeout=hedge_after)
+    if done or breaker.state != CLOSED:
+        return await first
+    second = asyncio.ensure_future(send())
+    tasks = {first: "first", second: "hedge"}
+    pending = set(tasks)
+    result = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                result = task.exception() or task.result()
+                if not _retryable(result) and not isinstance(result, BaseException):
+                    registry.inc("n8n_hedged_total", endpoint=endpoint, winner=tasks[task])
+                    return result
+    finally:
+        for task in pending:
+            task.cancel()
+    registry.inc("n8n_hedged_total", endpoint=endpoint, winner="none")
+    if isinstance(result, BaseException):
+        raise result
+    return result
+
+
+async def read_with_retries(send, endpoint: str, retries: int | None = None) -> httpx.Response:
+    """Runs an idempotent read (`send` makes one request) with hedging and jittered exponential backoff.
+
+    Timeouts, connection errors and 429/502/503/504 are retried; an open breaker is not.
+    """
+    retries = Config.N8N_READ_RETRIES if retries is None else retries
+    for attempt in range(retries + 1):
+        try:
+            resp = await _hedged(send, endpoint, Config.N8N_HEDGE_AFTER)
+        except httpx.HTTPError as exc:
+            if attempt == retries or not _retryable(exc):
+                raise
+            logger.info("%s attempt %d failed (%s), retrying", endpoint, attempt + 1, exc)
+        else:
+            if attempt == retries or not _retryable(resp):
+                return resp
+            logger.info("%s attempt %d got HTTP %s, retrying", endpoint, attempt + 1, resp.status_code)
+        registry.inc("n8n_retries_total", endpoint=endpoint)
+        await asyncio.sleep(Config.N8N_RETRY_BACKOFF * 2 ** attempt * random.uniform(0.5, 1.0))
+
+
+def health_url() -> str | None:
+    """N8N_HEALTH_URL, or n8n's own /healthz on the webhook host."""
+    if Config.N8N_HEALTH_URL:
+        return Config.N8N_HEALTH_URL
+    if not Config.N8N_WEBHOOK_URL:
+        return None
+    parts = urlsplit(Config.N8N_WEBHOOK_URL)
+    return f"{parts.scheme}://{parts.netloc}/healthz"
+
+
+class KeepWarm:
+    """Pings the backend so it does not fall asleep while people are using the app.
+
+    A ping is due `interval` seconds after the last successful contact, so real
+    traffic defers it. The interval halves when a ping runs into a cold start and
+    grows back by a quarter after each fast one, between KEEPWARM_MIN_INTERVAL and
+    KEEPWARM_MAX_INTERVAL. While the breaker is open, pings are the recovery
+    probes. Without user requests for KEEPWARM_IDLE_AFTER seconds, pinging
+    pauses and the instance may sleep.
+    """
+
+    COLD_START = 5.0  # a ping slower than this woke the instance up
+
+    def __init__(self, transport, url: str) -> None:
+        self.transport = transport
+        self.url = url
+        self.interval = Config.KEEPWARM_MAX_INTERVAL
+        self.last_activity = time.time()
+        self.last_ping = 0.0
+        self.pings = 0
+        self.cold_starts = 0
+
+    def touch(self) -> None:
+        """Notes a user-driven request."""
+        self.last_activity = time.time()
+
+    def _idle(self) -> bool:
+        return Config.KEEPWARM_IDLE_AFTER > 0 and time.time() - self.last_activity > Config.KEEPWARM_IDLE_AFTER
+
+    async def run(self) -> None:
+        while True:
+            if self._idle():
+                await asyncio.sleep(Config.KEEPWARM_MIN_INTERVAL)
+                continue
+            if breaker.state == CLOSED:
+                last_contact = max(breaker.last_success, self.last_ping)
+                wait = last_contact + self.interval - time.time()
+                # Re-check at least every minimum interval, since traffic may defer the ping.
+                wait = min(wait, Config.KEEPWARM_MIN_INTERVAL)
+            else:
+                wait = breaker.retry_in()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            elif not await self.ping():
+                await asyncio.sleep(1.0)  # another request holds the probe
+
+    async def ping(self) -> bool:
+        """Pings once; returns False if the breaker refused it."""
+        self.last_ping = time.time()
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            resp = await self.transport.arequest("health", "GET", self.url)
+            if resp.status_code >= 400:
+                outcome = f"http_{resp.status_code}"
+        except CircuitOpenError:
+            return False
+        except httpx.HTTPError as exc:
+            outcome = type(exc).__name__
+        self.pings += 1
+        elapsed = time.perf_counter() - started
+        registry.observe("keepwarm_ping_seconds", elapsed, outcome=outcome)
+        if outcome != "ok":
+            logger.warning("Keep-warm ping failed: %s", outcome)
+        elif elapsed > self.COLD_START:
+            self.cold_starts += 1
+            self.interval = max(Config.KEEPWARM_MIN_INTERVAL, self.interval / 2)
+            logger.info("Keep-warm ping hit a cold start (%.1fs); interval now %.0fs", elapsed, self.interval)
+        else:
+            self.interval = min(Config.KEEPWARM_MAX_INTERVAL, self.interval * 1.25)
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "interval": round(self.interval),
+            "pings": self.pings,
+            "cold_starts": self.cold_starts,
+            "last_ping": self.last_ping,
+            "idle": self._idle(),
+        }
+
+
+keepwarm: KeepWarm | None = None
+_keepwarm_lock = threading.Lock()
+
+
+def start_keepwarm(transport) -> None:
+    """Starts the keep-warm pinger on the transport loop once per process, if enabled.
+
+    Called by `get_transport` when the shared transport is first built.
+    """
+    global keepwarm
+    with _keepwarm_lock:
+        url = health_url()
+        if keepwarm is not None or not Config.KEEPWARM_ENABLED or not url:
+            return
+        keepwarm = KeepWarm(transport, url)
+        transport.spawn(keepwarm.run())
+
+
+def status() -> dict:
+    """Breaker state plus keep-warm stats, for the sidebar and cache_stats."""
+    return {**breaker.snapshot(), "keepwarm": keepwarm.stats() if keepwarm else None}
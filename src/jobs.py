@@ -0,0 +1,130 @@
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from .config import Config
+from .metrics import registry
+
+
+logger = logging.getLogger(__name__)
+
+
+class QueueBusyError(Exception):
+    """Raised by `JobQueue.submit` when the user or the whole server is at its limit."""
+
+
+class Job:
+    """One agent turn running in the background; script threads poll its fields."""
+
+    QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+    def __init__(self, job_id: str, owner: str, message: str, session_id: str | None) -> None:
+        self.id = job_id
+        self.owner = owner
+        self.message = message
+        self.session_id = session_id
+        self.state = self.QUEUED
+        self.text = ""  # reply received so far
+        self.data: dict | None = None  # same dict send_message returns, once finished
+        self.created = time.time()
+        self.finished: float | None = None
+        self.future = None
+
+    @property
+    def done(self) -> bool:
+        return self.state in (self.DONE, self.FAILED)
+
+    def wait(self, timeout: float | None = None) -> dict | None:
+        """Blocks until the job finishes (or `timeout` passes) and returns its data."""
+        if self.future is not None:
+            try:
+                self.future.result(timeout)
+            except TimeoutError:
+                pass
+        return self.data
+
+
+class JobQueue:
+    """Bounded pool of agent turns running on the transport loop.
+
+    At most `workers` turns talk to n8n at once; up to `max_queued` more wait for a
+    slot. Each user may have `per_user` turns in flight, and re-submitting a prompt
+    that is already in flight for the same session returns the existing job.
+    """
+
+    def __init__(self, manager, workers: int | None = None, max_queued: int | None = None,
+                 per_user: int | None = None, result_ttl: float | None = None) -> None:
+        self.manager = manager
+        self.workers = workers or Config.JOB_WORKERS
+        self.max_queued = Config.JOB_MAX_QUEUED if max_queued is None else max_queued
+        self.per_user = per_user or Config.JOB_PER_USER
+        self.result_ttl = Config.JOB_RESULT_TTL if result_ttl is None else result_ttl
+        self._slots: asyncio.Semaphore | None = None
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._jobs: dict[str, Job] = {}
+        self._inflight: dict[tuple, Job] = {}
+
+    def submit(self, message: str, session_id: str | None, user=None, prior_turns: int | None = None) -> Job:
+        owner = getattr(user, "email", None) or session_id or "anonymous"
+        key = (owner, session_id, message.strip())
+        with self._lock:
+            self._prune()
+            job = self._inflight.get(key)
+            if job is not None:
+                registry.inc("chat_jobs_total", outcome="deduplicated")
+                return job
+            active = list(self._inflight.values())
+            if sum(1 for job in active if job.owner == owner) >= self.per_user:
+                registry.inc("chat_jobs_total", outcome="user_busy")
+                raise QueueBusyError("Your previous question is still being answered. Please wait for it to finish.")
+            if len(active) >= self.workers + self.max_queued:
+                registry.inc("chat_jobs_total", outcome="server_busy")
+                raise QueueBusyError("The assistant is busy right now. Please try again in a moment.")
+            job = Job(f"job-{next(self._ids)}", owner, message, session_id)
+            self._jobs[job.id] = job
+            self._inflight[key] = job
+        job.future = self.manager.transport.spawn(self._run(job, key, user, prior_turns))
+        return job
+
+    def get(self, job_id: str | None) -> Job | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    async def _run(self, job: Job, key: tuple, user, prior_turns: int | None) -> None:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        try:
+            async with self._slots:
+                job.state = Job.RUNNING
+                registry.observe("chat_job_wait_seconds", time.time() - job.created)
+                stream = self.manager.stream_message(job.message, job.session_id, user, prior_turns)
+                async for text in stream:
+                    job.text += text
+                job.data = stream.data
+                job.state = Job.DONE
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("Chat job %s failed: %s", job.id, exc)
+            job.data = {"response": f"Error: {exc}", "sessionId": job.session_id}
+            job.state = Job.FAILED
+        finally:
+            job.finished = time.time()
+            registry.inc("chat_jobs_total", outcome=job.state)
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.result_ttl
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished and job.finished < cutoff]:
+            del self._jobs[job_id]
+
+    def stats(self) -> dict:
+        with self._lock:
+            states = [job.state for job in self._inflight.values()]
+            return {
+                "running": states.count(Job.RUNNING),
+                "queued": states.count(Job.QUEUED),
+                "capacity": self.workers + self.max_queued,
+                "retained": len(self._jobs),
+            }
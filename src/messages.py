@@ -0,0 +1,142 @@
+import sys
+from array import array
+from .config import Config
+
+
+# Role tags as stored by n8n's Postgres chat memory; kept once and referenced by index.
+ROLES = tuple(sys.intern(role) for role in ("human", "ai", "system", "tool"))
+_ROLE_INDEX = {role: i for i, role in enumerate(ROLES)}
+
+
+class Message:
+    """Read-only view of one stored message, created on iteration."""
+
+    __slots__ = ("role", "content")
+
+    def __init__(self, role: str, content: str) -> None:
+        self.role = role
+        self.content = content
+
+    @property
+    def is_user(self) -> bool:
+        return self.role == "human"
+
+    def to_dict(self) -> dict:
+        """Returns the LangChain-shaped dict n8n uses, e.g. for the history cache."""
+        return {"type": self.role, "data": {"content": self.content}}
+
+
+def _unpack(raw) -> tuple[int, str]:
+    if isinstance(raw, Message):
+        return _ROLE_INDEX.get(raw.role, 1), raw.content
+    if isinstance(raw, (list, tuple)):
+        # `[type, content]` row from a projected history response (see wire.HISTORY_FIELDS).
+        role, content = raw[0], raw[1]
+        return _ROLE_INDEX.get(role, 1), content if isinstance(content, str) else str(content or "")
+    content = (raw.get("data") or {}).get("content", "")
+    return _ROLE_INDEX.get(raw.get("type"), 1), content if isinstance(content, str) else str(content)
+
+
+class MessageStore:
+    """The messages of one session that are resident in `st.session_state`.
+
+    Holds messages [start, end) of the session's `total`, as a byte array of role
+    indexes plus a list of content strings, built from `[type, content]` rows or
+    whole LangChain dicts (whose ids, kwargs and metadata are dropped on the way
+    in). At most `limit` messages stay resident: adding newer ones evicts the
+    oldest, loading older ones evicts the newest, and evicted messages are fetched
+    again with `get_history_page` / `get_history_since`.
+    """
+
+    __slots__ = ("start", "total", "limit", "_roles", "_contents")
+
+    def __init__(self, start: int = 0, total: int = 0, messages=(), limit: int | None = None) -> None:
+        self.start = start
+        self.total = total
+        self.limit = limit or Config.MESSAGE_RESIDENT_LIMIT
+        self._roles = array("B")
+        self._contents: list[str] = []
+        self._extend(messages)
+        self.total = max(self.total, self.end)
+        self._evict_oldest()
+
+    @classmethod
+    def from_page(cls, page, limit: int | None = None) -> "MessageStore":
+        return cls(page.start, page.total, page.messages, limit)
+
+    def __len__(self) -> int:
+        return len(self._contents)
+
+    def __iter__(self):
+        roles = ROLES
+        for role, content in zip(self._roles, self._contents):
+            yield Message(roles[role], content)
+
+    @property
+    def end(self) -> int:
+        return self.start + len(self._contents)
+
+    @property
+    def has_older(self) -> bool:
+        return self.start > 0
+
+    @property
+    def has_newer(self) -> bool:
+        return self.end < self.total
+
+    def newest(self, count: int) -> list[Message]:
+        """The last `count` resident messages, oldest first."""
+        begin = max(0, len(self._contents) - count)
+        return [Message(ROLES[self._roles[i]], self._contents[i]) for i in range(begin, len(self._contents))]
+
+    def _extend(self, messages) -> None:
+        for raw in messages:
+            role, content = _unpack(raw)
+            self._roles.append(role)
+            self._contents.append(content)
+
+    def append(self, messages) -> None:
+        """Adds messages that follow the newest one stored in the session (e.g. a new turn)."""
+        messages = list(messages)
+        if self.has_newer:
+            # Not contiguous with the resident window; it will be fetched with the newer page.
+            self.total += len(messages)
+            return
+        self._extend(messages)
+        self.total = max(self.total, self.end)
+        self._evict_oldest()
+
+    def append_page(self, page) -> None:
+        """Adds a page of newer messages that starts at or before `end`."""
+        skip = self.end - page.start
+        if skip < 0:
+            return
+        self._extend(page.messages[skip:])
+        self.total = max(page.total, self.end)
+        self._evict_oldest()
+
+    def prepend_page(self, page) -> None:
+        """Adds a page of older messages that ends at or after `start`."""
+        keep = self.start - page.start
+        if keep <= 0 or page.end < self.start:
+            return
+        older = MessageStore(page.start, page.total, page.messages[:keep], limit=max(keep, 1))
+        self._roles[0:0] = older._roles
+        self._contents[0:0] = older._contents
+        self.start = page.start
+        overflow = len(self._contents) - self.limit
+        if overflow > 0:
+            del self._roles[-overflow:]
+            del self._contents[-overflow:]
+
+    def _evict_oldest(self) -> None:
+        overflow = len(self._contents) - self.limit
+        if overflow > 0:
+            del self._roles[:overflow]
+            del self._contents[:overflow]
+            self.start += overflow
+
+    def nbytes(self) -> int:
+        """Approximate memory held by this store, including message text."""
+        return (sys.getsizeof(self) + sys.getsizeof(self._roles) + sys.getsizeof(self._contents)
+                + sum(sys.getsizeof(content) for content in self._contents))
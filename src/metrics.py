@@ -0,0 +1,216 @@
+"""In-process counters, histograms and timing spans, exportable in Prometheus text format.
+
+Set METRICS_PORT to serve `/metrics` from a local thread, or METRICS_FILE to have
+the text exposition rewritten every METRICS_FILE_INTERVAL seconds.
+"""
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from .config import Config
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 90)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{v}"'.replace("\n", " ") for k, v in pairs)
+    return "{" + body + "}"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.counters: dict[str, dict[tuple, float]] = {}
+        self.histograms: dict[str, dict[tuple, list]] = {}
+        self.help: dict[str, str] = {}
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            key = _label_key(labels)
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            key = _label_key(labels)
+            # [bucket counts..., sum, count]
+            state = series.setdefault(key, [0] * len(DEFAULT_BUCKETS) + [0.0, 0])
+            for i, bound in enumerate(DEFAULT_BUCKETS):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def describe(self, name: str, text: str) -> None:
+        self.help[name] = text
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name, series in sorted(self.counters.items()):
+                if name in self.help:
+                    lines.append(f"# HELP {name} {self.help[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+            for name, series in sorted(self.histograms.items()):
+                if name in self.help:
+                    lines.append(f"# HELP {name} {self.help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, state in series.items():
+                    for i, bound in enumerate(DEFAULT_BUCKETS):
+                        lines.append(f"{name}_bucket{_format_labels(key, (('le', str(bound)),))} {state[i]}")
+                    lines.append(f"{name}_bucket{_format_labels(key, (('le', '+Inf'),))} {state[-1]}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {state[-2]}")
+                    lines.append(f"{name}_count{_format_labels(key)} {state[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+registry.describe("n8n_requests_total", "Requests to n8n webhooks by endpoint and outcome.")
+registry.describe("n8n_request_seconds", "End-to-end n8n request time by endpoint and outcome.")
+registry.describe("n8n_request_phase_seconds", "n8n request time split into connect, server_wait and decode.")
+registry.describe("auth_call_seconds", "Supabase auth calls by operation and outcome.")
+registry.describe("auth_token_checks_total", "Current-user checks answered by local JWT verification, the auth server, or neither (unchecked, on reruns).")
+registry.describe("router_decisions_total", "Prompts sent with a pre-router hint, by route (supervisor = no hint).")
+registry.describe("chat_jobs_total", "Background chat turns by final state, or why a submit was refused or merged.")
+registry.describe("chat_job_wait_seconds", "Time a chat turn waited in the queue for a worker slot.")
+registry.describe("streamlit_run_seconds", "Streamlit script/fragment execution time by scope.")
+registry.describe("streamlit_render_seconds", "Time spent rendering parts of the chat page.")
+
+
+class Span:
+    """Times a block; set `outcome` inside the block to tag the result (default ok/error)."""
+
+    def __init__(self, name: str, labels: dict) -> None:
+        self.name = name
+        self.labels = labels
+        self.outcome: str | None = None
+        self.started = time.perf_counter()
+
+
+@contextmanager
+def span(name: str, **labels):
+    current = Span(name, labels)
+    try:
+        yield current
+    except BaseException as exc:
+        # Streamlit's rerun/stop signals are control flow, not failures.
+        if current.outcome is None:
+            current.outcome = "rerun" if type(exc).__name__ in ("RerunException", "StopException") else "error"
+        raise
+    finally:
+        registry.observe(f"{name}_seconds", time.perf_counter() - current.started,
+                         outcome=current.outcome or "ok", **labels)
+
+
+class RequestTrace:
+    """httpx/httpcore trace hook that splits a request into connect and server-wait phases."""
+
+    def __init__(self) -> None:
+        self.phases: dict[str, float] = {}
+        self._started: dict[str, float] = {}
+
+    async def __call__(self, event_name: str, info: dict) -> None:
+        self.on_event(event_name)
+
+    def on_event(self, event_name: str) -> None:
+        step, _, state = event_name.rpartition(".")
+        if step.startswith("connection."):
+            phase = "connect"
+        elif step.endswith("receive_response_headers"):
+            phase = "server_wait"
+        else:
+            return
+        now = time.perf_counter()
+        if state == "started":
+            self._started[step] = now
+        elif step in self._started:
+            self.phases[phase] = self.phases.get(phase, 0.0) + now - self._started.pop(step)
+
+    def record(self, endpoint: str) -> None:
+        for phase, seconds in self.phases.items():
+            registry.observe("n8n_request_phase_seconds", seconds, endpoint=endpoint, phase=phase)
+
+
+def log_payload(logger: logging.Logger, label: str, payload) -> None:
+    """Logs a sampled, size-capped rendering of a payload at DEBUG level only."""
+    if not logger.isEnabledFor(logging.DEBUG) or random.random() >= Config.PAYLOAD_LOG_SAMPLE:
+        return
+    try:
+        text = json.dumps(payload, default=str, ensure_ascii=False)
+    except (TypeError, ValueError):
+        text = repr(payload)
+    if len(text) > Config.PAYLOAD_LOG_MAX_CHARS:
+        text = f"{text[:Config.PAYLOAD_LOG_MAX_CHARS]}... ({len(text)} chars)"
+    logger.debug("%s: %s", label, text)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        body = registry.render().encode()
+        self.send_response(200 if self.path.startswith("/metrics") else 404)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+_exporter_lock = threading.Lock()
+_exporter_started = False
+
+
+def write_file(path: str) -> None:
+    with open(path, "w") as fh:
+        fh.write(registry.render())
+
+
+def _file_writer(path: str, interval: float) -> None:
+    while True:
+        time.sleep(interval)
+        try:
+            write_file(path)
+        except OSError as exc:
+            logging.getLogger(__name__).warning("Could not write metrics file %s: %s", path, exc)
+
+
+def start_exporters() -> None:
+    """Starts the configured /metrics endpoint and/or file writer once per process."""
+    global _exporter_started
+    with _exporter_lock:
+        if _exporter_started:
+            return
+        _exporter_started = True
+        if Config.METRICS_PORT:
+            server = ThreadingHTTPServer(("127.0.0.1", Config.METRICS_PORT), _MetricsHandler)
+            threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        if Config.METRICS_FILE:
+            threading.Thread(target=_file_writer, args=(Config.METRICS_FILE, Config.METRICS_FILE_INTERVAL),
+                             name="metrics-file", daemon=True).start()
+
+
+def configure_logging() -> None:
+    """Routes this package's loggers to stderr at LOG_LEVEL (Streamlit leaves them unconfigured)."""
+    logger = logging.getLogger("src")
+    if logger.handlers:
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(Config.LOG_LEVEL)
+    logger.propagate = False
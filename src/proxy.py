@@ -0,0 +1,257 @@
+"""Read-through caching proxy for the Jikan and Animechan APIs used by the n8n agent tools.
+
+Run with `python -m src.proxy` and point the workflow's HTTP tools at
+`http://<host>:<port>/jikan/v4/...` and `http://<host>:<port>/animechan/v1/...`
+instead of `https://api.jikan.moe/v4/...` and `https://api.animechan.io/v1/...`.
+`/catalog/resolve?q=<title>` answers title→MAL id lookups from the local catalog
+(see src/catalog.py) without any upstream call.
+"""
+import argparse
+import json
+import logging
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from cachetools import LRUCache
+import httpx
+from .config import Config
+from .metrics import configure_logging
+
+
+logger = logging.getLogger(__name__)
+
+# (pattern on the upstream path, seconds to keep a response); first match wins.
+ROUTE_TTLS = [
+    (re.compile(r"^/v4/(anime|manga)/\d+/news"), 30 * 60),
+    (re.compile(r"^/v4/top/"), 12 * 3600),
+    (re.compile(r"^/v4/seasons/now"), 6 * 3600),
+    (re.compile(r"^/v4/seasons/\d+/\w+"), 24 * 3600),
+    (re.compile(r"^/v4/(anime|manga)/\d+/(pictures|videos|recommendations)"), 24 * 3600),
+    (re.compile(r"^/v4/(anime|manga|characters)$"), 6 * 3600),
+    (re.compile(r"^/v1/quotes/random"), 0),
+    (re.compile(r"^/v1/quotes"), 24 * 3600),
+]
+DEFAULT_TTL = 10 * 60
+
+
+def ttl_for(path: str) -> int:
+    for pattern, ttl in ROUTE_TTLS:
+        if pattern.search(path):
+            return ttl
+    return DEFAULT_TTL
+
+
+class TokenBucket:
+    """Blocking token-bucket limiter for requests toward one upstream host."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class CachedResponse:
+    __slots__ = ("status", "content_type", "body", "expires_at", "stale_until", "revalidate_at")
+
+    def __init__(self, status: int, content_type: str, body: bytes, ttl: float, max_stale: float) -> None:
+        now = time.time()
+        self.status = status
+        self.content_type = content_type
+        self.body = body
+        self.expires_at = now + ttl
+        self.stale_until = now + ttl + max_stale
+        self.revalidate_at = 0.0  # pushed back after a failed background revalidation
+
+
+class _Flight:
+    """One upstream fetch that concurrent identical requests wait on (or a background revalidation)."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: tuple | None = None
+
+
+class CachingProxy:
+    """Cache, request coalescing, rate limiting and stale-while-revalidate, independent of the HTTP server.
+
+    An expired entry still inside its PROXY_MAX_STALE window is served at once while
+    one background fetch refreshes it, so an upstream outage never holds a caller for
+    PROXY_UPSTREAM_TIMEOUT. A failed refresh is retried no sooner than
+    PROXY_REVALIDATE_BACKOFF seconds later.
+    """
+
+    def __init__(self, upstreams: dict[str, str] | None = None, rate: float | None = None,
+                 burst: int | None = None, max_stale: float | None = None,
+                 cache_size: int | None = None, client: httpx.Client | None = None,
+                 revalidate_backoff: float | None = None) -> None:
+        self.upstreams = upstreams or {
+            "jikan": Config.PROXY_JIKAN_UPSTREAM,
+            "animechan": Config.PROXY_ANIMECHAN_UPSTREAM,
+        }
+        rate = rate or Config.PROXY_UPSTREAM_RATE
+        burst = burst or Config.PROXY_UPSTREAM_BURST
+        self.buckets = {name: TokenBucket(rate, burst) for name in self.upstreams}
+        self.max_stale = Config.PROXY_MAX_STALE if max_stale is None else max_stale
+        self.revalidate_backoff = Config.PROXY_REVALIDATE_BACKOFF if revalidate_backoff is None else revalidate_backoff
+        self.client = client or httpx.Client(timeout=Config.PROXY_UPSTREAM_TIMEOUT, follow_redirects=True)
+        self.cache = LRUCache(maxsize=cache_size or Config.PROXY_CACHE_SIZE)
+        self._lock = threading.Lock()
+        self._flights: dict[str, _Flight] = {}
+        self.stats = {"hit": 0, "miss": 0, "stale": 0, "coalesced": 0, "revalidated": 0,
+                      "upstream_errors": 0, "rate_limited": 0}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    def handle(self, path: str) -> tuple[int, str, bytes, str]:
+        """Serves `/<upstream>/<path>?<query>`; returns (status, content type, body, cache state)."""
+        name, _, rest = path.lstrip("/").partition("/")
+        if name not in self.upstreams:
+            return 404, "application/json", b'{"error": "unknown upstream"}', "BYPASS"
+        upstream_path = "/" + rest
+        key = f"{name}:{upstream_path}"
+        ttl = ttl_for(upstream_path.split("?", 1)[0])
+
+        now = time.time()
+        with self._lock:
+            entry = self.cache.get(key)
+            if entry and entry.expires_at > now:
+                self.stats["hit"] += 1
+                return entry.status, entry.content_type, entry.body, "HIT"
+            flight = self._flights.get(key)
+            if entry and entry.stale_until > now:
+                self.stats["stale"] += 1
+                if flight is None and entry.revalidate_at <= now:
+                    self._flights[key] = flight = _Flight()
+                    threading.Thread(target=self._revalidate, args=(name, upstream_path, key, ttl, entry, flight),
+                                     name="proxy-revalidate", daemon=True).start()
+                return entry.status, entry.content_type, entry.body, "STALE"
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            self._count("coalesced")
+            flight.done.wait(Config.PROXY_UPSTREAM_TIMEOUT * 2)
+            if flight.result is not None:
+                status, content_type, body, _ = flight.result
+                return status, content_type, body, "COALESCED"
+            return 504, "application/json", b'{"error": "upstream timeout"}', "COALESCED"
+
+        self._count("miss")
+        try:
+            flight.result = self._fetch(name, upstream_path, key, ttl)
+            return flight.result
+        finally:
+            flight.done.set()
+            with self._lock:
+                self._flights.pop(key, None)
+
+    def _revalidate(self, name: str, upstream_path: str, key: str, ttl: float, entry: CachedResponse,
+                    flight: _Flight) -> None:
+        """Refreshes an expired entry while requests keep getting the stale copy."""
+        try:
+            flight.result = self._fetch(name, upstream_path, key, ttl)
+            status = flight.result[0]
+            if status == 200:
+                self._count("revalidated")
+            else:
+                entry.revalidate_at = time.time() + self.revalidate_backoff
+                logger.warning("Revalidating %s got HTTP %s; serving the stale copy", key, status)
+        finally:
+            flight.done.set()
+            with self._lock:
+                self._flights.pop(key, None)
+
+    def _fetch(self, name: str, upstream_path: str, key: str, ttl: float) -> tuple:
+        if not self.buckets[name].acquire(Config.PROXY_RATE_WAIT):
+            self._count("rate_limited")
+            return self._error(429, "rate limited by proxy")
+        try:
+            resp = self.client.get(self.upstreams[name].rstrip("/") + upstream_path)
+        except httpx.HTTPError as exc:
+            self._count("upstream_errors")
+            return self._error(502, f"upstream error: {exc}")
+        content_type = resp.headers.get("content-type", "application/json")
+        if resp.status_code == 429 or resp.status_code >= 500:
+            self._count("upstream_errors")
+            return self._error(resp.status_code, f"upstream status {resp.status_code}")
+        if resp.status_code == 200 and ttl > 0:
+            with self._lock:
+                self.cache[key] = CachedResponse(resp.status_code, content_type, resp.content, ttl, self.max_stale)
+        return resp.status_code, content_type, resp.content, "MISS"
+
+    @staticmethod
+    def _error(status: int, reason: str) -> tuple:
+        return status, "application/json", json.dumps({"error": reason}).encode(), "MISS"
+
+
+class ProxyHandler(BaseHTTPRequestHandler):
+    proxy: CachingProxy = None  # set by serve()
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        if self.path == "/healthz":
+            self._send(200, "application/json", b'{"status": "ok"}', "BYPASS")
+            return
+        if self.path == "/stats":
+            self._send(200, "application/json", json.dumps(self.proxy.stats).encode(), "BYPASS")
+            return
+        if self.path.startswith("/catalog/resolve"):
+            from .catalog import handle_resolve  # catalog imports TokenBucket from this module
+            self._send(*handle_resolve(self.path.partition("?")[2]))
+            return
+        self._send(*self.proxy.handle(self.path))
+
+    def _send(self, status: int, content_type: str, body: bytes, cache_state: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-Cache", cache_state)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        logger.info("%s %s", self.address_string(), format % args)
+
+
+def serve(host: str, port: int, proxy: CachingProxy | None = None) -> ThreadingHTTPServer:
+    handler = type("BoundProxyHandler", (ProxyHandler,), {"proxy": proxy or CachingProxy()})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Caching proxy for Jikan and Animechan")
+    parser.add_argument("--host", default=Config.PROXY_HOST)
+    parser.add_argument("--port", type=int, default=Config.PROXY_PORT)
+    args = parser.parse_args()
+    configure_logging()
+    server = serve(args.host, args.port)
+    if Config.CATALOG_REFRESH_INTERVAL > 0:
+        from .catalog import start_refresher
+        start_refresher(Config.CATALOG_REFRESH_INTERVAL)
+    logger.info("Listening on http://%s:%s", args.host, args.port)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Keyword pre-router that tags prompts with the sub-agent the Supervisor would pick.
+
+The hint rides along in the webhook payload (`route_hint`, `route_confidence`,
+and `route_args` for seasons) so the workflow can dispatch obvious prompts straight
+to the Anime or Manga agent, or to a season tool, and skip the Supervisor's LLM
+call. Prompts without a confident route carry no hint and go through the
+Supervisor as before.
+"""
+import re
+from .answer_cache import normalize
+from .config import Config
+from .metrics import registry
+
+
+SEASONS = {"spring": "spring", "summer": "summer", "fall": "fall", "autumn": "fall", "winter": "winter"}
+SEASON_NOW = re.compile(r"\b((this|current|latest|ongoing) season|(seasonal|airing|ongoing) anime|airing)\b")
+SEASON_YEAR = re.compile(r"\b(spring|summer|fall|autumn|winter) (\d{4})\b|\b(\d{4}) (spring|summer|fall|autumn|winter)\b")
+
+# Weight 2 marks words only one agent has tools for (per prompts.md); weight 1 only suggests it.
+ANIME_CUES = {
+    **dict.fromkeys(("anime", "animes", "ova", "ona", "seiyuu", "episode", "episodes", "ep", "eps", "dub",
+                     "dubbed", "trailer", "trailers", "pv", "youtube", "video", "videos", "quote", "quotes",
+                     "said"), 2),
+    **dict.fromkeys(("watch", "watching", "watched", "studio", "opening", "ending", "movie", "season",
+                     "seasons", "waifu", "husbando"), 1),
+}
+MANGA_CUES = {
+    **dict.fromkeys(("manga", "mangas", "manhwa", "manhua", "mangaka", "webtoon", "chapter", "chapters",
+                     "volume", "volumes", "tankobon", "scanlation"), 2),
+    **dict.fromkeys(("read", "reading", "serialized", "serialization", "panel", "panels"), 1),
+}
+# Words that point at an earlier turn; the Supervisor resolves those from history.
+REFERS_BACK = {"it", "its", "that", "this", "them", "they", "those", "same", "previous", "he", "she", "his", "her"}
+
+
+class Route:
+    __slots__ = ("name", "confidence", "args")
+
+    def __init__(self, name: str | None, confidence: float, args: dict | None = None) -> None:
+        self.name = name
+        self.confidence = confidence
+        self.args = args
+
+
+def _score(words: list[str], cues: dict) -> tuple[int, int]:
+    strong = sum(1 for word in words if cues.get(word) == 2)
+    weak = sum(1 for word in words if cues.get(word) == 1)
+    return strong, weak
+
+
+def classify(prompt: str, prior_turns: int = 0) -> Route:
+    """Picks the route the Supervisor would take, with a confidence in [0, 1]."""
+    text = normalize(prompt)
+    words = text.split()
+    if not words:
+        return Route(None, 0.0)
+
+    if (match := SEASON_YEAR.search(text)) and not _score(words, MANGA_CUES)[0]:
+        season = match.group(1) or match.group(4)
+        year = match.group(2) or match.group(3)
+        return Route("season", 0.95, {"year": int(year), "season": SEASONS[season]})
+    if SEASON_NOW.search(text) and not _score(words, MANGA_CUES)[0]:
+        return Route("season_now", 0.9)
+
+    anime_strong, anime_weak = _score(words, ANIME_CUES)
+    manga_strong, manga_weak = _score(words, MANGA_CUES)
+    if anime_strong and manga_strong:
+        return Route(None, 0.0)  # "is the anime faithful to the manga" needs the Supervisor
+    anime = anime_strong * 2 + anime_weak
+    manga = manga_strong * 2 + manga_weak
+    if anime == manga:
+        return Route(None, 0.0)
+    name, strong, total, against = (
+        ("anime", anime_strong, anime, manga) if anime > manga else ("manga", manga_strong, manga, anime)
+    )
+
+    confidence = (0.85 if strong else 0.65) + 0.05 * (total - (2 if strong else 1))
+    confidence -= 0.2 * against
+    if prior_turns and REFERS_BACK.intersection(words):
+        # "news about it" may be about a manga from earlier in the chat.
+        confidence -= 0.25
+    return Route(name, round(max(0.0, min(confidence, 0.98)), 2))
+
+
+def route_hint(prompt: str, prior_turns: int | None = None) -> dict:
+    """Payload fields for a confident route, or {} to leave routing to the Supervisor."""
+    if not Config.ROUTER_ENABLED:
+        return {}
+    route = classify(prompt, prior_turns or 0)
+    if route.name is None or route.confidence < Config.ROUTER_MIN_CONFIDENCE:
+        registry.inc("router_decisions_total", route="supervisor")
+        return {}
+    registry.inc("router_decisions_total", route=route.name)
+    hint = {"route_hint": route.name, "route_confidence": route.confidence}
+    if route.args:
+        hint["route_args"] = route.args
+    return hint
@@ -0,0 +1,159 @@
+import threading
+import time
+from collections import OrderedDict
+from itertools import islice
+from cachetools import LRUCache
+
+
+TITLE_CHARS = 50
+
+
+def created_at_from_id(session_id: str) -> float | None:
+    """Reads the creation time embedded in `web_{username}_{base36 ms}_{random}` ids."""
+    parts = session_id.rsplit("_", 2)
+    if len(parts) != 3:
+        return None
+    try:
+        return int(parts[1], 36) / 1000
+    except ValueError:
+        return None
+
+
+def make_title(text: str) -> str:
+    """Same title the workflow's sessions listing derives from a session's first message."""
+    return text[:TITLE_CHARS] + ("..." if len(text) > TITLE_CHARS else "")
+
+
+class SessionSummary:
+    __slots__ = ("session_id", "title", "created_at", "updated_at", "message_count")
+
+    def __init__(self, session_id: str, title: str, created_at: float | None,
+                 updated_at: float | None = None, message_count: int = 0) -> None:
+        self.session_id = session_id
+        self.title = title
+        self.created_at = created_at
+        self.updated_at = updated_at or created_at
+        self.message_count = message_count
+
+    @classmethod
+    def from_dict(cls, raw: dict) -> "SessionSummary":
+        session_id = raw.get("session_id", "")
+        created = raw.get("created_at") or created_at_from_id(session_id)
+        return cls(session_id, raw.get("title") or "new_conversation", created,
+                   raw.get("updated_at"), raw.get("message_count") or 0)
+
+    def to_dict(self) -> dict:
+        return {
+            "session_id": self.session_id,
+            "title": self.title,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "message_count": self.message_count,
+        }
+
+
+class SessionPage:
+    """One slice of a user's sessions, most recently updated first."""
+
+    def __init__(self, items: list[SessionSummary], offset: int, total: int) -> None:
+        self.items = items
+        self.offset = offset
+        self.total = total
+
+    @property
+    def has_more(self) -> bool:
+        return self.offset + len(self.items) < self.total
+
+
+class _UserSessions:
+    __slots__ = ("summaries", "synced_at")
+
+    def __init__(self) -> None:
+        self.summaries: OrderedDict[str, SessionSummary] = OrderedDict()
+        self.synced_at = 0.0
+
+
+class SessionIndex:
+    """Per-user session summaries, shared by every Streamlit session in the process.
+
+    Seeded from the workflow's sessions listing and then kept current by each
+    reply (`record_turn`), so listing a page costs the same however many sessions
+    a user has. A listing older than `ttl` is re-synced to pick up sessions made
+    elsewhere (e.g. Telegram), keeping locally known activity.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.ttl = ttl
+        self._users = LRUCache(maxsize=max(maxsize, 1))
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def is_fresh(self, username: str) -> bool:
+        with self._lock:
+            entry = self._users.get(username)
+            fresh = entry is not None and time.time() - entry.synced_at < self.ttl
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return fresh
+
+    def sync(self, username: str, sessions: list[dict]) -> None:
+        """Merges a full listing from the workflow, keeping newer local activity."""
+        with self._lock:
+            entry = self._users.get(username) or _UserSessions()
+            merged = []
+            for raw in sessions:
+                summary = SessionSummary.from_dict(raw)
+                known = entry.summaries.get(summary.session_id)
+                if known is not None:
+                    summary.updated_at = max(summary.updated_at or 0, known.updated_at or 0) or None
+                    summary.message_count = max(summary.message_count, known.message_count)
+                merged.append(summary)
+            # Ids embed their creation time, so they order sessions that have no timestamps at all.
+            merged.sort(key=lambda s: (s.updated_at or 0, s.session_id), reverse=True)
+            entry.summaries = OrderedDict((s.session_id, s) for s in merged)
+            entry.synced_at = time.time()
+            self._users[username] = entry
+
+    def record_turn(self, username: str, session_id: str, message: str, added: int = 2) -> None:
+        """Creates or bumps a session after a reply; no-op until the user's listing is loaded."""
+        now = time.time()
+        with self._lock:
+            entry = self._users.get(username)
+            if entry is None:
+                return
+            summary = entry.summaries.get(session_id)
+            if summary is None:
+                summary = SessionSummary(session_id, make_title(message), created_at_from_id(session_id) or now)
+                entry.summaries[session_id] = summary
+            summary.updated_at = now
+            summary.message_count += added
+            entry.summaries.move_to_end(session_id, last=False)
+
+    def page(self, username: str, offset: int = 0, limit: int | None = None) -> SessionPage:
+        with self._lock:
+            entry = self._users.get(username)
+            if entry is None:
+                return SessionPage([], offset, 0)
+            stop = None if limit is None else offset + limit
+            items = list(islice(entry.summaries.values(), offset, stop))
+            return SessionPage(items, offset, len(entry.summaries))
+
+    def latest(self, username: str) -> str | None:
+        with self._lock:
+            entry = self._users.get(username)
+            return next(iter(entry.summaries), None) if entry else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._users),
+                "maxsize": self._users.maxsize,
+                "sessions": sum(len(entry.summaries) for entry in self._users.values()),
+            }
@@ -0,0 +1,50 @@
+import logging
+import jwt
+from .config import Config
+
+
+logger = logging.getLogger(__name__)
+
+
+class TokenVerifier:
+    """Checks Supabase access tokens locally instead of asking the auth server.
+
+    HS256 tokens are checked against SUPABASE_JWT_SECRET; asymmetric ones against the
+    project's JWKS, fetched once and cached. Anything it cannot check returns None so
+    the caller falls back to a network `get_user`.
+    """
+
+    AUDIENCE = "authenticated"
+
+    def __init__(self, secret: str | None, jwks_url: str | None, jwks_ttl: float) -> None:
+        self.secret = secret
+        self._jwks = jwt.PyJWKClient(jwks_url, lifespan=jwks_ttl) if jwks_url else None
+
+    def verify(self, token: str) -> dict | None:
+        """Returns the token's claims, or None if it cannot be checked locally.
+
+        Raises `jwt.InvalidTokenError` for expired, tampered or malformed tokens.
+        """
+        algorithm = jwt.get_unverified_header(token).get("alg")
+        if algorithm == "HS256":
+            if not self.secret:
+                return None
+            key = self.secret
+        else:
+            if self._jwks is None:
+                return None
+            try:
+                key = self._jwks.get_signing_key_from_jwt(token).key
+            except (jwt.PyJWKClientError, jwt.PyJWKError, jwt.PyJWKSetError) as exc:
+                # e.g. JWKS unreachable, or ES256/RS256 keys without `cryptography` installed.
+                logger.warning("Cannot verify %s token locally: %s", algorithm, exc)
+                return None
+        return jwt.decode(token, key, algorithms=[algorithm], audience=self.AUDIENCE,
+                          leeway=Config.JWT_LEEWAY)
+
+
+verifier = TokenVerifier(
+    Config.SUPABASE_JWT_SECRET,
+    f"{Config.SUPABASE_URL}/auth/v1/.well-known/jwks.json" if Config.SUPABASE_URL else None,
+    Config.SUPABASE_JWKS_TTL,
+)
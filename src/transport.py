@@ -0,0 +1,175 @@
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+import httpx
+from .config import Config
+from . import health
+from .health import breaker, CircuitOpenError
+from .metrics import RequestTrace, registry, span
+
+
+class Transport:
+    """Process-wide, connection-pooled HTTP client shared by every Streamlit session.
+
+    Requests run on one background event loop through an `httpx.AsyncClient`, so
+    async callers can fan out concurrently while sync callers simply block on `run`.
+    """
+
+    def __init__(self) -> None:
+        self.timeouts = {
+            "chat": Config.N8N_CHAT_TIMEOUT,
+            "history": Config.N8N_HISTORY_TIMEOUT,
+            "sessions": Config.N8N_SESSIONS_TIMEOUT,
+            "health": Config.KEEPWARM_TIMEOUT,
+        }
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="n8n-transport", daemon=True)
+        self._thread.start()
+        self.client = self.run(self._make_client())
+        self._lock = threading.Lock()
+        self._stats: dict = {}
+
+    async def _make_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            http2=Config.N8N_HTTP2,
+            limits=httpx.Limits(
+                max_connections=Config.N8N_POOL_SIZE,
+                max_keepalive_connections=Config.N8N_POOL_SIZE,
+                keepalive_expiry=Config.N8N_KEEPALIVE_EXPIRY,
+            ),
+        )
+
+    def run(self, coro):
+        """Runs a coroutine on the transport loop and blocks until it finishes."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def spawn(self, coro):
+        """Schedules a coroutine on the transport loop without waiting for it."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def iterate(self, agen):
+        """Drives an async generator from synchronous code, one item at a time."""
+        try:
+            while True:
+                try:
+                    yield self.run(agen.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self.run(agen.aclose())
+
+    def timeout_for(self, endpoint: str) -> httpx.Timeout:
+        return httpx.Timeout(self.timeouts.get(endpoint, 30), connect=Config.N8N_CONNECT_TIMEOUT)
+
+    def _admit(self, endpoint: str) -> bool:
+        """Asks the circuit breaker to let a request through; returns whether it is the recovery probe."""
+        try:
+            return breaker.acquire()
+        except CircuitOpenError:
+            self._record(endpoint, "circuit_open")
+            raise
+
+    def _prepare(self, endpoint: str, kwargs: dict) -> RequestTrace:
+        if endpoint != "health" and health.keepwarm is not None:
+            health.keepwarm.touch()
+        kwargs.setdefault("timeout", self.timeout_for(endpoint))
+        trace = RequestTrace()
+        kwargs["extensions"] = {**kwargs.get("extensions", {}), "trace": trace}
+        return trace
+
+    async def arequest(self, endpoint: str, method: str, url: str, **kwargs) -> httpx.Response:
+        """Sends a request through the shared pool, recording per-endpoint stats and timings."""
+        probe = self._admit(endpoint)
+        trace = self._prepare(endpoint, kwargs)
+        with span("n8n_request", endpoint=endpoint) as timing:
+            try:
+                resp = await self.client.request(method, url, **kwargs)
+            except httpx.HTTPError as exc:
+                timing.outcome = _error_outcome(exc)
+                self._record(endpoint, timing.outcome, probe)
+                raise
+            except BaseException:
+                breaker.abandon(probe)  # e.g. the losing copy of a hedged read was cancelled
+                raise
+            finally:
+                trace.record(endpoint)
+            timing.outcome = _status_outcome(resp.status_code)
+        self._record(endpoint, timing.outcome, probe)
+        return resp
+
+    @asynccontextmanager
+    async def astream(self, endpoint: str, method: str, url: str, **kwargs):
+        """Streams a response body through the shared pool; use as an async context manager."""
+        probe = self._admit(endpoint)
+        trace = self._prepare(endpoint, kwargs)
+        recorded = False
+        with span("n8n_request", endpoint=endpoint, streamed="true") as timing:
+            try:
+                async with self.client.stream(method, url, **kwargs) as resp:
+                    timing.outcome = _status_outcome(resp.status_code)
+                    self._record(endpoint, timing.outcome, probe)
+                    recorded = True
+                    yield resp
+            except httpx.HTTPError as exc:
+                timing.outcome = _error_outcome(exc)
+                # An error mid-body is counted, but the breaker already heard from this request.
+                self._record(endpoint, timing.outcome, None if recorded else probe)
+                raise
+            except BaseException:
+                if not recorded:
+                    breaker.abandon(probe)
+                raise
+            finally:
+                trace.record(endpoint)
+
+    def _record(self, endpoint: str, outcome: str, probe: bool | None = None) -> None:
+        registry.inc("n8n_requests_total", endpoint=endpoint, outcome=outcome)
+        if probe is not None:
+            breaker.record(outcome, probe)
+        with self._lock:
+            stats = self._stats.setdefault(endpoint, {"requests": 0, "errors": 0})
+            stats["requests"] += 1
+            if outcome != "ok":
+                stats["errors"] += 1
+
+    def pool_stats(self) -> dict:
+        """Returns request counters per endpoint plus a snapshot of the connection pool."""
+        pool = getattr(self.client._transport, "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        with self._lock:
+            endpoints = {name: dict(stats) for name, stats in self._stats.items()}
+        return {
+            "endpoints": endpoints,
+            "connections": len(connections),
+            "idle": sum(1 for conn in connections if conn.is_idle()),
+            "http2": sum(1 for conn in connections if "HTTP/2" in repr(conn)),
+            "max_connections": Config.N8N_POOL_SIZE,
+        }
+
+    def close(self) -> None:
+        self.run(self.client.aclose())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+def _status_outcome(status: int) -> str:
+    return "ok" if status < 400 else f"http_{status}"
+
+
+def _error_outcome(exc: httpx.HTTPError) -> str:
+    return "timeout" if isinstance(exc, httpx.TimeoutException) else "connection_error"
+
+
+_transport: Transport | None = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> Transport:
+    """Returns the shared transport, creating it (and starting the keep-warm pinger) on first use."""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                transport = Transport()
+                health.start_keepwarm(transport)
+                _transport = transport
+    return _transport
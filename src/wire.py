@@ -0,0 +1,69 @@
+"""Wire format of the n8n history and sessions webhooks.
+
+Requests name the fields the app renders (`fields`), and the workflow answers with
+one positional row per record instead of whole stored documents, e.g.
+`{"fields": ["type", "content"], "messages": [["human", "hi"], ...]}`. Older
+workflows ignore `fields` and keep sending documents, which still decode.
+
+httpx asks for and undoes gzip/deflate itself. n8n's webhooks only answer JSON, so
+msgpack (`application/msgpack`) is asked for only with N8N_ACCEPT_MSGPACK and the
+optional `msgpack` package, e.g. against bench/fake_n8n. Bodies are parsed in full
+on arrival; only turning rows into `Message` objects waits until a `MessageStore`
+is iterated.
+"""
+import time
+import httpx
+from .config import Config
+from .metrics import registry
+
+try:
+    import msgpack
+except ImportError:  # JSON only
+    msgpack = None
+
+
+HISTORY_FIELDS = ("type", "content")
+SESSION_FIELDS = ("session_id", "title", "created_at", "updated_at", "message_count")
+ACCEPT = "application/msgpack, application/json;q=0.9" if msgpack and Config.N8N_ACCEPT_MSGPACK else "application/json"
+
+registry.describe("n8n_response_bytes_total", "n8n response size as read off the socket (wire) and decompressed (body).")
+registry.describe("n8n_responses_total", "n8n responses by body format and content encoding.")
+
+
+def decode(resp: httpx.Response, endpoint: str):
+    """Decodes a JSON or msgpack body, recording decode time and wire vs body bytes."""
+    content_type = resp.headers.get("content-type", "")
+    body_format = "msgpack" if "msgpack" in content_type else "json"
+    started = time.perf_counter()
+    try:
+        if body_format == "msgpack":
+            if msgpack is None:
+                raise ValueError("received msgpack but the msgpack package is not installed")
+            return msgpack.unpackb(resp.content, raw=False)
+        return resp.json()
+    finally:
+        registry.observe("n8n_request_phase_seconds", time.perf_counter() - started, endpoint=endpoint, phase="decode")
+        registry.inc("n8n_response_bytes_total", resp.num_bytes_downloaded, endpoint=endpoint, stage="wire")
+        registry.inc("n8n_response_bytes_total", len(resp.content), endpoint=endpoint, stage="body")
+        registry.inc("n8n_responses_total", endpoint=endpoint, format=body_format,
+                     encoding=resp.headers.get("content-encoding", "identity"))
+
+
+def history_rows(data: dict) -> list:
+    """A history response's messages as `[type, content]` rows, or as documents from older workflows."""
+    messages = data.get("messages") or []
+    fields = data.get("fields")
+    if not fields or tuple(fields) == HISTORY_FIELDS:
+        return messages
+    # Same fields in another order: reorder rather than fall back to documents.
+    order = [fields.index(name) for name in HISTORY_FIELDS]
+    return [[row[i] for i in order] for row in messages]
+
+
+def session_dicts(data: dict) -> list[dict]:
+    """A sessions response's rows as summary dicts (documents pass through)."""
+    sessions = data.get("sessions") or []
+    fields = data.get("fields")
+    if not fields:
+        return sessions
+    return [dict(zip(fields, row)) for row in sessions]